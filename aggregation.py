@@ -0,0 +1,101 @@
+"""Turn a judging panel's scores into round results.
+
+Each scoring type has a rule: how the panel's marks for a field are
+combined (mean, trimmed mean, median, ...) and how the combined fields
+are weighted into the round total. Combiners and rules are registered by
+name, so an event can plug in its own. Like grading.py, this module has
+no Flask or database imports.
+"""
+
+from collections import namedtuple
+
+# combine: name of the combiner applied to each field across the panel
+# weights: field -> weight in the round total (fields not listed don't count)
+# decimals: rounding of the combined fields and the total
+ScoringRule = namedtuple('ScoringRule', ['combine', 'weights', 'decimals'])
+
+
+def panel_mean(values):
+    return sum(values) / len(values)
+
+
+def panel_median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def trimmed_mean(values):
+    """Mean without the single highest and lowest mark, once there are at least 4."""
+    values = sorted(values)
+    if len(values) >= 4:
+        values = values[1:-1]
+    return sum(values) / len(values)
+
+
+def drop_high_low_sum(values):
+    """Sum without the single highest and lowest mark, once there are at least 3."""
+    values = sorted(values)
+    if len(values) >= 3:
+        values = values[1:-1]
+    return sum(values)
+
+
+COMBINERS = {
+    'mean': panel_mean,
+    'median': panel_median,
+    'trimmed_mean': trimmed_mean,
+    'drop_high_low_sum': drop_high_low_sum,
+    'sum': sum,
+}
+
+RULES = {
+    # Style, dive plan and camera (quality + progression) add up to the round score
+    'ws-free': ScoringRule('trimmed_mean', {'style': 1, 'dive_plan': 1, 'cam_quality': 1, 'cam_progressive': 1}, 2),
+    'ws-compulsory': ScoringRule('trimmed_mean', {'style': 1}, 2),
+    'cp-freestyle': ScoringRule('trimmed_mean', {'score': 1}, 2),
+    # Point counts: the middle judge's count, not an average of miscounts
+    'fs-points': ScoringRule('median', {'points': 1}, 1),
+    'cf-points': ScoringRule('median', {'points': 1}, 1),
+    'ae-score': ScoringRule('trimmed_mean', {'score': 1}, 2),
+}
+
+
+def register_combiner(name, func):
+    """Add a combiner: func takes a non-empty list of marks and returns one number."""
+    COMBINERS[name] = func
+
+
+def register_rule(scoring_type, rule):
+    """Set the rule for a scoring type; its combiner must already be registered."""
+    if rule.combine not in COMBINERS:
+        raise ValueError(f'Unknown combiner: {rule.combine}')
+    RULES[scoring_type] = rule
+
+
+def rule_from_dict(data):
+    """Build a ScoringRule from JSON config ({"combine", "weights", "decimals"})."""
+    weights = {str(field): float(weight) for field, weight in data['weights'].items()}
+    return ScoringRule(data.get('combine', 'mean'), weights, int(data.get('decimals', 2)))
+
+
+def aggregate_round(scoring_type, scores_by_judge):
+    """Combine a panel's scores into the round result.
+
+    `scores_by_judge` maps judge number to {field: value}. Judges missing
+    any field the rule weights are left out. Returns None if no rule
+    applies or no judge has a full set, otherwise a dict with `total`,
+    the combined `fields` and `judges_counted`.
+    """
+    rule = RULES.get(scoring_type)
+    if rule is None:
+        return None
+    counted = [scores for scores in scores_by_judge.values()
+               if all(scores.get(field) is not None for field in rule.weights)]
+    if not counted:
+        return None
+    combine = COMBINERS[rule.combine]
+    fields = {field: round(combine([float(scores[field]) for scores in counted]), rule.decimals)
+              for field in rule.weights}
+    total = sum(fields[field] * weight for field, weight in rule.weights.items())
+    return {'total': round(total, rule.decimals), 'fields': fields, 'judges_counted': len(counted)}
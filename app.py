@@ -8,9 +8,10 @@ import re
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, g
+from flask import (Flask, render_template, request, jsonify, redirect, url_for, session, g, Response,
+                   send_from_directory)
 
 # Load .env file if it exists
 env_path = Path(__file__).parent / '.env'
@@ -23,46 +24,63 @@ if env_path.exists():
                 os.environ.setdefault(key.strip(), value.strip())
 from functools import wraps
 from questions import TESTS as DEFAULT_TESTS  # Fallback for initial seeding
+from grading import (compile_answer_key, compute_score, grade_submission,
+                     grade_sheets, regrade_answers)
+from item_analysis import aggregate_item_sums, item_statistics, SUM_FIELDS
+from local_store import LocalRoomStore
+from aggregation import aggregate_round, register_rule, rule_from_dict
+from scoring_marks import count_points, decode_marks, encode_marks, merge_marks
+
+
+import atexit
+import bisect
+import concurrent.futures
+import csv
+import fcntl
+import hashlib
+import io
+import multiprocessing
+import queue
+import select
+import threading
+import time
+import numpy as np
+import psycopg2
+import psycopg2.extras
+import psycopg2.extensions
+import psycopg2.pool
 
+app = Flask(__name__)
+app.secret_key = os.environ.get('SECRET_KEY', 'uspa-judge-test-secret-key-change-in-production')
+DATABASE_URL = os.environ.get('DATABASE_URL', '')
 
-def normalize_section_ref(section):
-    """Normalize section reference to allow formatting flexibility.
-
-    Handles variations like:
-    - "8-1.3.1" vs "8.1.3.1" vs "8 1 3 1"
-    - "Section 8-1.3.1" vs "8-1.3.1"
-    - "Sec. 8-1.3.1" vs "8-1.3.1"
-    - Trailing punctuation
-    - Various dash types (em dash, en dash, hyphen)
-    """
-    if not section:
-        return ''
-
-    s = section.strip().lower()
-
-    # Remove common prefixes
-    prefixes = ['section', 'sec.', 'sec', 'ch.', 'ch', 'chapter']
-    for prefix in prefixes:
-        if s.startswith(prefix):
-            s = s[len(prefix):].strip()
-
-    # Normalize various dash types to hyphen
-    s = re.sub(r'[–—−]', '-', s)  # en dash, em dash, minus sign -> hyphen
+# 'all' serves everything; 'scoring' (set by scoring_server.py) serves only
+# the live scoring routes and socket events, and skips database setup
+APP_ROLE = os.environ.get('APP_ROLE', 'all')
 
-    # Remove all separators and spaces, keep only alphanumeric
-    s = re.sub(r'[\s.\-_]+', '', s)
+# Connection pool configuration (per gunicorn worker)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800))
+DB_POOL_HEALTHCHECK_AFTER = float(os.environ.get('DB_POOL_HEALTHCHECK_AFTER', 30))
+DB_COOPERATIVE = os.environ.get('DB_COOPERATIVE', 'auto').lower()
 
-    # Remove trailing punctuation
-    s = s.rstrip('.,;:')
+# Seconds between version checks of the in-process test catalog, in case a
+# NOTIFY from another worker is missed
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', 300))
+CATALOG_CHANNEL = 'test_catalog'
 
-    return s
+# Batch grading: sheets per call, and when to fan out to a process pool
+BATCH_GRADE_MAX_SHEETS = int(os.environ.get('BATCH_GRADE_MAX_SHEETS', 10000))
+BATCH_GRADE_WORKERS = int(os.environ.get('BATCH_GRADE_WORKERS', os.cpu_count() or 1))
+BATCH_GRADE_POOL_MIN = int(os.environ.get('BATCH_GRADE_POOL_MIN', 1000))
+BATCH_GRADE_CHUNK = 250
 
-import psycopg2
-import psycopg2.extras
+# Item analysis: attempts a question needs before it is flagged for review
+ITEM_STATS_MIN_ATTEMPTS = int(os.environ.get('ITEM_STATS_MIN_ATTEMPTS', 20))
 
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'uspa-judge-test-secret-key-change-in-production')
-DATABASE_URL = os.environ.get('DATABASE_URL', '')
+# Admin dashboard: how many of the newest results it lists
+ADMIN_RECENT_RESULTS = int(os.environ.get('ADMIN_RECENT_RESULTS', 100))
 
 # Categories based on chapters
 CATEGORIES = {
@@ -166,19 +184,158 @@ We recommend changing your password after your first login.
     return False, str(last_error)
 
 
+def _gevent_wait_callback(conn, timeout=None):
+    """psycopg2 wait callback that yields to the gevent hub while a query is in flight."""
+    from gevent.socket import wait_read, wait_write
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            break
+        elif state == psycopg2.extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == psycopg2.extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f'Bad result from poll: {state}')
+
+
+def enable_cooperative_db():
+    """Make psycopg2 cooperate with gevent so slow queries don't stall the worker.
+
+    DB_COOPERATIVE=auto (default) enables it only when gevent has patched the
+    socket module, i.e. under the GeventWebSocketWorker. Set it to "on" to
+    force it or "off" to keep plain blocking calls.
+    """
+    if DB_COOPERATIVE in ('off', '0', 'false', 'no'):
+        return False
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    if DB_COOPERATIVE == 'auto' and not monkey.is_module_patched('socket'):
+        return False
+    psycopg2.extensions.set_wait_callback(_gevent_wait_callback)
+    return True
+
+
+DB_COOPERATIVE_ENABLED = enable_cooperative_db()
+if DB_COOPERATIVE_ENABLED:
+    print("[DB] Cooperative (gevent) database access enabled")
+
+
+class PgConnectionPool:
+    """Bounded PostgreSQL connection pool.
+
+    Uses threading primitives, which gunicorn's gevent worker monkey-patches,
+    so a request waiting for a free connection yields to other greenlets
+    (including Socket.IO handlers) instead of blocking the worker.
+    Idle connections are health-checked before reuse and recycled once they
+    exceed the configured max lifetime.
+    """
+
+    def __init__(self, dsn, size, timeout, max_lifetime, healthcheck_after):
+        self.dsn = dsn
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.healthcheck_after = healthcheck_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []  # stack of (conn, last_used), most recently used last
+        self._created = {}  # conn -> creation time
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        with self._lock:
+            self._created[conn] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created.pop(conn, None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn):
+        created = self._created.get(conn)
+        return created is None or time.monotonic() - created > self.max_lifetime
+
+    def _healthy(self, conn, last_used):
+        if conn.closed or self._expired(conn):
+            return False
+        if time.monotonic() - last_used < self.healthcheck_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        """Check out a connection, waiting up to `timeout` seconds for a free slot."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise psycopg2.pool.PoolError(f'No database connection available after {self.timeout}s')
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, last_used = self._idle.pop()
+                if self._healthy(conn, last_used):
+                    return conn
+                self._discard(conn)
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, rolling back any open transaction."""
+        try:
+            if discard or conn.closed or self._expired(conn):
+                self._discard(conn)
+                return
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                self._discard(conn)
+                return
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        """Close all idle connections (checked-out connections close on return)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+db_pool = PgConnectionPool(DATABASE_URL, DB_POOL_SIZE, DB_POOL_TIMEOUT,
+                           DB_POOL_MAX_LIFETIME, DB_POOL_HEALTHCHECK_AFTER)
+
+
 def get_db():
-    """Get PostgreSQL database connection."""
+    """Get a pooled PostgreSQL connection for the current request."""
     if 'db' not in g:
-        g.db = psycopg2.connect(DATABASE_URL)
+        g.db = db_pool.getconn()
     return g.db
 
 
 @app.teardown_appcontext
 def close_db(exception):
-    """Close database connection at end of request."""
+    """Return the request's connection to the pool."""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        db_pool.putconn(db)
 
 
 def init_db():
@@ -209,6 +366,80 @@ def init_db():
         )
     ''')
 
+    # Normalized result columns; `data` only holds legacy rows awaiting migration
+    cursor.execute('''
+        ALTER TABLE test_results
+            ALTER COLUMN data DROP NOT NULL,
+            ADD COLUMN IF NOT EXISTS username TEXT,
+            ADD COLUMN IF NOT EXISTS student TEXT,
+            ADD COLUMN IF NOT EXISTS test_id TEXT,
+            ADD COLUMN IF NOT EXISTS test_name TEXT,
+            ADD COLUMN IF NOT EXISTS score DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS passed BOOLEAN,
+            ADD COLUMN IF NOT EXISTS passing_score INTEGER,
+            ADD COLUMN IF NOT EXISTS total_points DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS total_possible INTEGER,
+            ADD COLUMN IF NOT EXISTS total_questions INTEGER,
+            ADD COLUMN IF NOT EXISTS taken_at TIMESTAMPTZ
+    ''')
+
+    # Create test_result_questions table for per-question result detail
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS test_result_questions (
+            result_id TEXT NOT NULL REFERENCES test_results(result_id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            options TEXT NOT NULL DEFAULT '[]',
+            user_answer INTEGER,
+            correct_answer INTEGER,
+            is_correct BOOLEAN NOT NULL,
+            user_section TEXT NOT NULL DEFAULT '',
+            correct_section TEXT NOT NULL DEFAULT '',
+            is_section_correct BOOLEAN NOT NULL,
+            question_points DOUBLE PRECISION NOT NULL,
+            section_approved_by TEXT,
+            PRIMARY KEY (result_id, position)
+        )
+    ''')
+
+    # Create latest_test_results rollup (most recent attempt per student per test)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS latest_test_results (
+            username TEXT NOT NULL,
+            test_id TEXT NOT NULL,
+            result_id TEXT NOT NULL REFERENCES test_results(result_id) ON DELETE CASCADE,
+            score DOUBLE PRECISION,
+            passed BOOLEAN,
+            taken_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (username, test_id)
+        )
+    ''')
+
+    # Create item analysis tables (additive sums per question, see item_analysis.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS item_stats (
+            test_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            section_correct INTEGER NOT NULL DEFAULT 0,
+            rest_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            rest_sq_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            rest_correct_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            PRIMARY KEY (test_id, question_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS item_option_stats (
+            test_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            option INTEGER NOT NULL,
+            picks INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (test_id, question_id, option)
+        )
+    ''')
+
     # Create tests table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tests (
@@ -219,6 +450,35 @@ def init_db():
             questions TEXT NOT NULL
         )
     ''')
+    cursor.execute('ALTER TABLE tests ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1')
+    # Questions now live in their own table; the blob only holds legacy rows awaiting migration
+    cursor.execute('ALTER TABLE tests ALTER COLUMN questions DROP NOT NULL')
+
+    # Create questions table (one row per question, versioned for optimistic concurrency)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS questions (
+            test_id TEXT NOT NULL REFERENCES tests(test_id) ON DELETE CASCADE,
+            question_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            options TEXT NOT NULL,
+            correct INTEGER NOT NULL,
+            correct_section TEXT NOT NULL DEFAULT '',
+            version INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (test_id, question_id)
+        )
+    ''')
+
+    # Migrate legacy question blobs into the questions table
+    cursor.execute('''
+        INSERT INTO questions (test_id, question_id, position, question, options, correct, correct_section)
+        SELECT t.test_id, (q->>'id')::int, e.pos - 1, q->>'question', (q->'options')::text,
+               (q->>'correct')::int, COALESCE(q->>'correct_section', '')
+        FROM tests t, json_array_elements(t.questions::json) WITH ORDINALITY AS e(q, pos)
+        WHERE t.questions IS NOT NULL
+        ON CONFLICT (test_id, question_id) DO NOTHING
+    ''')
+    cursor.execute('UPDATE tests SET questions = NULL, version = version + 1 WHERE questions IS NOT NULL')
 
     # Create custom_questions table
     cursor.execute('''
@@ -254,6 +514,24 @@ def init_db():
         )
     ''')
 
+    # Create scoring_rounds table (finalized live-scoring rounds)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scoring_rounds (
+            round_id TEXT PRIMARY KEY,
+            room_code TEXT NOT NULL,
+            scoring_type TEXT NOT NULL,
+            event_judge_name TEXT,
+            judges TEXT NOT NULL,
+            scores TEXT NOT NULL,
+            video_url TEXT,
+            finalized_at TIMESTAMPTZ NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS scoring_rounds_room_time_idx '
+                   'ON scoring_rounds (room_code, finalized_at DESC, round_id DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS scoring_rounds_time_idx '
+                   'ON scoring_rounds (finalized_at DESC, round_id DESC)')
+
     # Create question_flags table for JWG flagged questions
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS question_flags (
@@ -313,17 +591,7 @@ def init_db():
     missing = [tid for tid in DEFAULT_TESTS if tid not in existing_tests]
     if missing:
         for test_id in missing:
-            test_data = DEFAULT_TESTS[test_id]
-            cursor.execute('''
-                INSERT INTO tests (test_id, name, chapter, passing_score, questions)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (test_id) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    chapter = EXCLUDED.chapter,
-                    passing_score = EXCLUDED.passing_score,
-                    questions = EXCLUDED.questions
-            ''', (test_id, test_data['name'], test_data['chapter'],
-                  test_data['passing_score'], json.dumps(test_data['questions'])))
+            _write_test(cursor, test_id, DEFAULT_TESTS[test_id])
         print(f"Auto-seeded {len(missing)} missing tests to database: {missing}")
 
     conn.commit()
@@ -427,37 +695,639 @@ def delete_user(username):
     db.commit()
 
 
+RESULT_SUMMARY_COLUMNS = (
+    'result_id, username, student, test_id, test_name, score, passed, passing_score, '
+    'total_points, total_possible, total_questions, taken_at'
+)
+
+
+def _parse_timestamp(value):
+    """Parse a stored ISO timestamp; naive values are server local time."""
+    if not value:
+        return None
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.astimezone()
+
+
+def _format_timestamp(value):
+    """Format a timestamptz the way results have always been displayed (naive local ISO)."""
+    if value is None:
+        return ''
+    return value.astimezone().replace(tzinfo=None).isoformat()
+
+
+def _result_summary(row):
+    """Build a result dict (without per-question detail) from a test_results row."""
+    return {
+        'student': row['student'],
+        'username': row['username'],
+        'test_id': row['test_id'],
+        'test_name': row['test_name'],
+        'score': row['score'],
+        'total_points': row['total_points'],
+        'total_possible': row['total_possible'],
+        'total_questions': row['total_questions'],
+        'passing_score': row['passing_score'],
+        'passed': row['passed'],
+        'timestamp': _format_timestamp(row['taken_at'])
+    }
+
+
+def _write_test_results(cursor, items):
+    """Write summary columns and per-question rows for (result_id, result_data) pairs.
+
+    Everything is sent as a few multi-row statements, so a batch of
+    thousands of results costs about as many round trips as a single one.
+    """
+    if not items:
+        return
+    result_ids = [result_id for result_id, _ in items]
+    # Retract stats contributed by any earlier version of these results
+    _apply_item_stats(cursor, result_ids, -1)
+    summaries = []
+    latest = {}
+    question_rows = []
+    for result_id, result_data in items:
+        taken_at = _parse_timestamp(result_data.get('timestamp'))
+        summaries.append((
+            result_id, result_data.get('username'), result_data.get('student'),
+            result_data.get('test_id'), result_data.get('test_name'), result_data.get('score'),
+            result_data.get('passed'), result_data.get('passing_score'),
+            result_data.get('total_points'), result_data.get('total_possible'),
+            result_data.get('total_questions'), taken_at
+        ))
+        if result_data.get('username') and result_data.get('test_id') and taken_at:
+            key = (result_data['username'], result_data['test_id'])
+            if key not in latest or latest[key][5] <= taken_at:
+                latest[key] = (key[0], key[1], result_id, result_data.get('score'),
+                               result_data.get('passed'), taken_at)
+        for position, r in enumerate(result_data.get('results', [])):
+            user_answer = r.get('user_answer')
+            question_rows.append((
+                result_id, position, r['id'], r.get('question', ''), json.dumps(r.get('options', [])),
+                user_answer if isinstance(user_answer, int) else None, r.get('correct_answer'),
+                bool(r.get('is_correct')), r.get('user_section') or '', r.get('correct_section') or '',
+                bool(r.get('is_section_correct')), r.get('question_points', 0),
+                r.get('section_approved_by')
+            ))
+
+    psycopg2.extras.execute_values(cursor, '''
+        INSERT INTO test_results
+        (result_id, username, student, test_id, test_name, score, passed, passing_score,
+         total_points, total_possible, total_questions, taken_at)
+        VALUES %s
+        ON CONFLICT (result_id) DO UPDATE SET
+            data = NULL,
+            username = EXCLUDED.username,
+            student = EXCLUDED.student,
+            test_id = EXCLUDED.test_id,
+            test_name = EXCLUDED.test_name,
+            score = EXCLUDED.score,
+            passed = EXCLUDED.passed,
+            passing_score = EXCLUDED.passing_score,
+            total_points = EXCLUDED.total_points,
+            total_possible = EXCLUDED.total_possible,
+            total_questions = EXCLUDED.total_questions,
+            taken_at = EXCLUDED.taken_at
+    ''', summaries)
+    if latest:
+        # Keep the latest-attempt rollup in step; older attempts never overwrite newer ones
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO latest_test_results (username, test_id, result_id, score, passed, taken_at)
+            VALUES %s
+            ON CONFLICT (username, test_id) DO UPDATE SET
+                result_id = EXCLUDED.result_id,
+                score = EXCLUDED.score,
+                passed = EXCLUDED.passed,
+                taken_at = EXCLUDED.taken_at
+            WHERE latest_test_results.taken_at <= EXCLUDED.taken_at
+        ''', list(latest.values()))
+    cursor.execute('DELETE FROM test_result_questions WHERE result_id = ANY(%s)', (result_ids,))
+    if question_rows:
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO test_result_questions
+            (result_id, position, question_id, question, options, user_answer, correct_answer,
+             is_correct, user_section, correct_section, is_section_correct, question_points,
+             section_approved_by)
+            VALUES %s
+        ''', question_rows)
+        _apply_item_stats(cursor, result_ids, 1)
+
+
+def _apply_item_stats(cursor, result_ids, sign):
+    """Add (sign=1) or retract (sign=-1) the item stats contributed by stored results.
+
+    Each question's rest score is the result's score without that
+    question's own points, so an item is not correlated with itself. Rows
+    are upserted in key order so concurrent submissions can't deadlock.
+    """
+    answers = '''
+        SELECT r.test_id, q.question_id, q.user_answer, q.is_correct, q.is_section_correct,
+               r.score - q.question_points * 100.0 / r.total_possible AS rest
+        FROM test_result_questions q
+        JOIN test_results r ON r.result_id = q.result_id
+        WHERE q.result_id = ANY(%(ids)s) AND r.test_id IS NOT NULL
+          AND r.score IS NOT NULL AND r.total_possible > 0
+    '''
+    cursor.execute(f'''
+        INSERT INTO item_stats AS s
+        (test_id, question_id, attempts, correct, section_correct, rest_sum, rest_sq_sum, rest_correct_sum)
+        SELECT test_id, question_id,
+               %(sign)s * COUNT(*),
+               %(sign)s * COUNT(*) FILTER (WHERE is_correct),
+               %(sign)s * COUNT(*) FILTER (WHERE is_section_correct),
+               %(sign)s * SUM(rest),
+               %(sign)s * SUM(rest * rest),
+               %(sign)s * COALESCE(SUM(rest) FILTER (WHERE is_correct), 0)
+        FROM ({answers}) a
+        GROUP BY test_id, question_id
+        ORDER BY test_id, question_id
+        ON CONFLICT (test_id, question_id) DO UPDATE SET
+            attempts = s.attempts + EXCLUDED.attempts,
+            correct = s.correct + EXCLUDED.correct,
+            section_correct = s.section_correct + EXCLUDED.section_correct,
+            rest_sum = s.rest_sum + EXCLUDED.rest_sum,
+            rest_sq_sum = s.rest_sq_sum + EXCLUDED.rest_sq_sum,
+            rest_correct_sum = s.rest_correct_sum + EXCLUDED.rest_correct_sum
+    ''', {'ids': list(result_ids), 'sign': sign})
+    cursor.execute(f'''
+        INSERT INTO item_option_stats AS s (test_id, question_id, option, picks)
+        SELECT test_id, question_id, user_answer, %(sign)s * COUNT(*)
+        FROM ({answers}) a
+        WHERE user_answer IS NOT NULL
+        GROUP BY test_id, question_id, user_answer
+        ORDER BY test_id, question_id, user_answer
+        ON CONFLICT (test_id, question_id, option) DO UPDATE SET picks = s.picks + EXCLUDED.picks
+    ''', {'ids': list(result_ids), 'sign': sign})
+
+
 def get_test_result(result_id):
     """Get test result from database."""
     db = get_db()
     cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute('SELECT data FROM test_results WHERE result_id = %s', (result_id,))
+    cursor.execute(f'SELECT {RESULT_SUMMARY_COLUMNS}, data FROM test_results WHERE result_id = %s',
+                   (result_id,))
     row = cursor.fetchone()
-    if row:
+    if not row:
+        return None
+    if row['taken_at'] is None and row['data']:
+        # Not yet migrated to the normalized schema
         return json.loads(row['data'])
-    return None
+    result = _result_summary(row)
+    cursor.execute(
+        'SELECT * FROM test_result_questions WHERE result_id = %s ORDER BY position',
+        (result_id,)
+    )
+    result['results'] = []
+    for q in cursor.fetchall():
+        r = {
+            'id': q['question_id'],
+            'question': q['question'],
+            'user_answer': q['user_answer'],
+            'correct_answer': q['correct_answer'],
+            'is_correct': q['is_correct'],
+            'user_section': q['user_section'],
+            'correct_section': q['correct_section'],
+            'is_section_correct': q['is_section_correct'],
+            'question_points': q['question_points'],
+            'options': json.loads(q['options'])
+        }
+        if q['section_approved_by']:
+            r['section_approved_by'] = q['section_approved_by']
+        result['results'].append(r)
+    return result
+
+
+def _legacy_result_summaries(cursor, test_ids=None):
+    """Summaries of results still only in the JSON blob (not yet migrated), as {result_id: summary}."""
+    cursor.execute('SELECT result_id, data FROM test_results WHERE taken_at IS NULL AND data IS NOT NULL')
+    summaries = {}
+    for row in cursor.fetchall():
+        data = json.loads(row['data'])
+        if test_ids is not None and data.get('test_id') not in test_ids:
+            continue
+        summary = {key: data.get(key) for key in (
+            'student', 'username', 'test_id', 'test_name', 'score', 'total_points', 'total_possible',
+            'total_questions', 'passing_score', 'passed')}
+        summary['timestamp'] = data.get('timestamp') or ''
+        summaries[row['result_id']] = summary
+    return summaries
+
 
+def get_all_test_results(test_ids=None):
+    """Get test result summaries (no per-question detail), newest first.
 
-def get_all_test_results():
-    """Get all test results from database."""
+    Pass `test_ids` to only return results for those tests. Results not
+    yet migrated are read from their JSON blob.
+    """
     db = get_db()
     cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute('SELECT result_id, data FROM test_results')
-    results = {}
-    for row in cursor.fetchall():
-        results[row['result_id']] = json.loads(row['data'])
+    if test_ids is None:
+        cursor.execute(f'SELECT {RESULT_SUMMARY_COLUMNS} FROM test_results '
+                       'WHERE taken_at IS NOT NULL ORDER BY taken_at DESC')
+    else:
+        cursor.execute(f'SELECT {RESULT_SUMMARY_COLUMNS} FROM test_results '
+                       'WHERE test_id = ANY(%s) ORDER BY taken_at DESC', (list(test_ids),))
+    results = {row['result_id']: _result_summary(row) for row in cursor.fetchall()}
+    legacy = _legacy_result_summaries(cursor, test_ids)
+    if legacy:
+        results.update(legacy)
+        results = dict(sorted(results.items(), key=lambda item: item[1]['timestamp'], reverse=True))
+    return results
+
+
+def get_recent_test_results(limit):
+    """Get the `limit` newest result summaries, newest first."""
+    db = get_db()
+    cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor.execute(f'SELECT {RESULT_SUMMARY_COLUMNS} FROM test_results '
+                   'WHERE taken_at IS NOT NULL ORDER BY taken_at DESC LIMIT %s', (limit,))
+    results = {row['result_id']: _result_summary(row) for row in cursor.fetchall()}
+    legacy = _legacy_result_summaries(cursor)
+    if legacy:
+        results.update(legacy)
+        newest = sorted(results.items(), key=lambda item: item[1]['timestamp'], reverse=True)
+        results = dict(newest[:limit])
     return results
 
 
+def count_test_results():
+    """(total, passed) over all test results, counted in the database."""
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute('''
+        SELECT COUNT(*),
+               COUNT(*) FILTER (WHERE COALESCE(passed, (data::jsonb ->> 'passed')::boolean))
+        FROM test_results
+    ''')
+    total, passed = cursor.fetchone()
+    return total, passed
+
+
+def get_latest_test_results(usernames=None):
+    """Get each student's most recent result per test as {username: {test_id: summary}}.
+
+    Reads the latest_test_results rollup, so cost tracks the number of
+    students rather than the size of the result history.
+    """
+    db = get_db()
+    cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    query = '''
+        SELECT username, test_id, result_id, score, passed, taken_at
+        FROM latest_test_results {}
+    '''
+    if usernames is None:
+        cursor.execute(query.format(''))
+    else:
+        cursor.execute(query.format('WHERE username = ANY(%s)'), (list(usernames),))
+    latest = {}
+    for row in cursor.fetchall():
+        latest.setdefault(row['username'], {})[row['test_id']] = {
+            'result_id': row['result_id'],
+            'score': row['score'],
+            'passed': row['passed'],
+            'timestamp': _format_timestamp(row['taken_at'])
+        }
+    # Results not yet migrated aren't in the rollup
+    for result_id, summary in _legacy_result_summaries(cursor).items():
+        username, test_id = summary['username'], summary['test_id']
+        if not username or not test_id or (usernames is not None and username not in usernames):
+            continue
+        current = latest.get(username, {}).get(test_id)
+        if current is None or current['timestamp'] <= summary['timestamp']:
+            latest.setdefault(username, {})[test_id] = {
+                'result_id': result_id,
+                'score': summary['score'],
+                'passed': summary['passed'],
+                'timestamp': summary['timestamp']
+            }
+    return latest
+
+
 def save_test_result(result_id, result_data):
     """Save test result to database."""
     db = get_db()
     cursor = db.cursor()
+    _write_test_results(cursor, [(result_id, result_data)])
+    db.commit()
+
+
+def regrade_test_results(test_id, dry_run=True, batch_size=1000):
+    """Regrade every stored result for a test against its current answer key.
+
+    Stored answers are loaded into arrays and re-evaluated in one vectorized
+    pass; examiner-approved references stay approved. Unless `dry_run`, the
+    changed question rows, result totals and the latest-attempt rollup are
+    written back in batches of `batch_size` results, one transaction each.
+
+    Returns a report of what changed (or would change).
+    """
+    invalidate_test_catalog()  # grade against the key as it is in the database now
+    test, answer_key = get_grading_data(test_id)
+    if test is None:
+        return None
+
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute('''
+        SELECT q.result_id, q.position, q.question_id, COALESCE(q.user_answer, -1), q.user_section,
+               q.section_approved_by IS NOT NULL, q.is_correct, q.is_section_correct,
+               q.question_points, q.correct_answer, q.correct_section
+        FROM test_result_questions q
+        JOIN test_results r ON r.result_id = q.result_id
+        WHERE r.test_id = %s
+        ORDER BY q.result_id, q.position
+    ''', (test_id,))
+    rows = cursor.fetchall()
     cursor.execute('''
-        INSERT INTO test_results (result_id, data) VALUES (%s, %s)
-        ON CONFLICT (result_id) DO UPDATE SET data = EXCLUDED.data
-    ''', (result_id, json.dumps(result_data)))
+        SELECT result_id, username, student, total_points, total_possible, passing_score, score, passed
+        FROM test_results WHERE test_id = %s
+    ''', (test_id,))
+    results = {row[0]: row for row in cursor.fetchall()}
+
+    report = {
+        'test_id': test_id,
+        'dry_run': dry_run,
+        'results_scanned': len(results),
+        'answers_scanned': len(rows),
+        'answers_changed': 0,
+        'results_changed': 0,
+        'newly_passed': 0,
+        'newly_failed': 0,
+        'changes': []
+    }
+    if not rows:
+        return report
+
+    (result_ids, positions, question_ids, user_answers, user_sections, approved,
+     old_correct, old_section_correct, old_points, old_answer, old_section) = zip(*rows)
+    regraded = regrade_answers(answer_key, [q['correct_section'] for q in test['questions']],
+                               question_ids, user_answers, user_sections, approved)
+    in_key = regraded['in_key']
+    is_correct = np.where(in_key, regraded['is_correct'], old_correct)
+    is_section_correct = np.where(in_key, regraded['is_section_correct'], old_section_correct)
+    points = np.where(in_key, regraded['question_points'], old_points)
+    correct_answer = np.where(in_key, regraded['correct_answer'], np.array(old_answer, dtype=object))
+    correct_section = np.where(in_key, regraded['correct_section'], np.array(old_section, dtype=object))
+
+    answer_changed = ((is_correct != np.asarray(old_correct))
+                      | (is_section_correct != np.asarray(old_section_correct))
+                      | (points != np.asarray(old_points, dtype=float))
+                      | (correct_answer != np.array(old_answer, dtype=object))
+                      | (correct_section != np.array(old_section, dtype=object)))
+    report['answers_changed'] = int(answer_changed.sum())
+
+    # Per-result point totals
+    result_keys, result_index = np.unique(np.asarray(result_ids, dtype=object), return_inverse=True)
+    totals = np.bincount(result_index, weights=points, minlength=len(result_keys))
+
+    result_updates = []
+    for result_id, total_points in zip(result_keys.tolist(), totals.tolist()):
+        _, username, student, old_total, total_possible, passing_score, old_score, old_passed = results[result_id]
+        if not total_possible or total_points == old_total:
+            continue
+        new_score = compute_score(total_points, total_possible)
+        # Legacy rows may not have stored the passing score they were taken under
+        if passing_score is None:
+            passing_score = test.get('passing_score', 70)
+        new_passed = new_score >= passing_score
+        result_updates.append((result_id, total_points, new_score, new_passed))
+        report['newly_passed'] += int(new_passed and not old_passed)
+        report['newly_failed'] += int(old_passed and not new_passed)
+        report['changes'].append({
+            'result_id': result_id,
+            'username': username,
+            'student': student,
+            'old_score': old_score,
+            'new_score': new_score,
+            'old_passed': old_passed,
+            'new_passed': new_passed
+        })
+    report['results_changed'] = len(result_updates)
+    if dry_run:
+        return report
+
+    # Write back, one transaction per batch of results
+    changed_rows = np.nonzero(answer_changed)[0]
+    answer_updates = {}
+    for i in changed_rows.tolist():
+        answer_updates.setdefault(result_ids[i], []).append((
+            result_ids[i], positions[i], bool(is_correct[i]), bool(is_section_correct[i]),
+            float(points[i]), None if correct_answer[i] is None else int(correct_answer[i]),
+            correct_section[i]
+        ))
+    totals_by_result = {u[0]: u for u in result_updates}
+    touched = sorted(set(answer_updates) | set(totals_by_result))
+    for start in range(0, len(touched), batch_size):
+        batch = touched[start:start + batch_size]
+        answer_rows = [row for rid in batch for row in answer_updates.get(rid, [])]
+        total_rows = [totals_by_result[rid] for rid in batch if rid in totals_by_result]
+        if answer_rows:
+            psycopg2.extras.execute_values(cursor, '''
+                UPDATE test_result_questions AS t SET
+                    is_correct = v.is_correct,
+                    is_section_correct = v.is_section_correct,
+                    question_points = v.question_points,
+                    correct_answer = v.correct_answer,
+                    correct_section = v.correct_section
+                FROM (VALUES %s) AS v(result_id, position, is_correct, is_section_correct,
+                                      question_points, correct_answer, correct_section)
+                WHERE t.result_id = v.result_id AND t.position = v.position
+            ''', answer_rows,
+                template='(%s, %s, %s::boolean, %s::boolean, %s::float8, %s::integer, %s)')
+        if total_rows:
+            psycopg2.extras.execute_values(cursor, '''
+                UPDATE test_results AS t SET
+                    total_points = v.total_points, score = v.score, passed = v.passed
+                FROM (VALUES %s) AS v(result_id, total_points, score, passed)
+                WHERE t.result_id = v.result_id
+            ''', total_rows, template='(%s, %s::float8, %s::float8, %s::boolean)')
+            psycopg2.extras.execute_values(cursor, '''
+                UPDATE latest_test_results AS t SET score = v.score, passed = v.passed
+                FROM (VALUES %s) AS v(result_id, total_points, score, passed)
+                WHERE t.result_id = v.result_id
+            ''', total_rows, template='(%s, %s::float8, %s::float8, %s::boolean)')
+        db.commit()
+    if touched:
+        recompute_item_stats([test_id])
+    print(f"Regraded {test_id}: {report['answers_changed']} answers, "
+          f"{report['results_changed']} results changed")
+    return report
+
+
+def recompute_item_stats(test_ids=None, db=None):
+    """Rebuild item stats from all stored results, vectorized.
+
+    Pass `test_ids` to only rebuild those tests. Incremental updates wait
+    on the table lock, so nothing is counted twice or lost while this runs.
+    Uses the request connection unless `db` is given. Returns the number
+    of answers aggregated.
+    """
+    db = db or get_db()
+    cursor = db.cursor()
+    cursor.execute('LOCK TABLE item_stats, item_option_stats IN SHARE ROW EXCLUSIVE MODE')
+    query = '''
+        SELECT r.test_id, q.question_id, COALESCE(q.user_answer, -1), q.is_correct,
+               q.is_section_correct, r.score - q.question_points * 100.0 / r.total_possible
+        FROM test_result_questions q
+        JOIN test_results r ON r.result_id = q.result_id
+        WHERE r.test_id IS NOT NULL AND r.score IS NOT NULL AND r.total_possible > 0 {}
+        ORDER BY r.test_id
+    '''
+    if test_ids is None:
+        cursor.execute(query.format(''))
+        rows = cursor.fetchall()
+        cursor.execute('DELETE FROM item_stats')
+        cursor.execute('DELETE FROM item_option_stats')
+    else:
+        cursor.execute(query.format('AND r.test_id = ANY(%s)'), (list(test_ids),))
+        rows = cursor.fetchall()
+        cursor.execute('DELETE FROM item_stats WHERE test_id = ANY(%s)', (list(test_ids),))
+        cursor.execute('DELETE FROM item_option_stats WHERE test_id = ANY(%s)', (list(test_ids),))
+
+    stat_rows = []
+    option_rows = []
+    start = 0
+    while start < len(rows):
+        test_id = rows[start][0]
+        end = start
+        while end < len(rows) and rows[end][0] == test_id:
+            end += 1
+        _, question_ids, user_answers, is_correct, is_section_correct, rest = zip(*rows[start:end])
+        sums, option_picks = aggregate_item_sums(question_ids, user_answers, is_correct,
+                                                 is_section_correct, rest)
+        stat_rows.extend((test_id, q_id) + tuple(q_sums[field] for field in SUM_FIELDS)
+                         for q_id, q_sums in sums.items())
+        option_rows.extend((test_id, q_id, option, picks)
+                           for (q_id, option), picks in option_picks.items())
+        start = end
+
+    if stat_rows:
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO item_stats
+            (test_id, question_id, attempts, correct, section_correct, rest_sum, rest_sq_sum, rest_correct_sum)
+            VALUES %s
+        ''', stat_rows)
+    if option_rows:
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO item_option_stats (test_id, question_id, option, picks) VALUES %s
+        ''', option_rows)
     db.commit()
+    print(f"Recomputed item stats from {len(rows)} answers")
+    return len(rows)
+
+
+def get_item_stats(test_id=None):
+    """Get derived item statistics as {test_id: {question_id: stats}}.
+
+    Questions are matched against the current catalog for the keyed option
+    and option count; stats for questions no longer in a test are skipped.
+    """
+    all_tests = get_all_tests()
+    db = get_db()
+    cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    where = '' if test_id is None else 'WHERE test_id = %s'
+    params = () if test_id is None else (test_id,)
+    cursor.execute(f'SELECT * FROM item_stats {where}', params)
+    sums = cursor.fetchall()
+    cursor.execute(f'SELECT test_id, question_id, option, picks FROM item_option_stats {where}', params)
+    picks = {}
+    for row in cursor.fetchall():
+        picks.setdefault((row['test_id'], row['question_id']), {})[row['option']] = row['picks']
+
+    stats = {}
+    questions = {}
+    for row in sums:
+        if row['test_id'] not in questions:
+            test = all_tests.get(row['test_id'])
+            questions[row['test_id']] = {q['id']: q for q in test['questions']} if test else {}
+        question = questions[row['test_id']].get(row['question_id'])
+        if question is None:
+            continue
+        item = item_statistics(row, picks.get((row['test_id'], row['question_id']), {}),
+                               question['correct'], len(question['options']), ITEM_STATS_MIN_ATTEMPTS)
+        if item:
+            stats.setdefault(row['test_id'], {})[row['question_id']] = item
+    return stats
+
+
+RESULTS_MIGRATION_LOCK = 720401  # pg advisory lock key for migrate_test_results
+
+
+def migrate_test_results(batch_size=500):
+    """Move legacy JSON results into the normalized columns, a batch at a time.
+
+    Safe to run while the app is serving: each batch is its own short
+    transaction, and readers (get_test_result, get_all_test_results,
+    get_latest_test_results) fall back to the JSON blob for rows not yet
+    migrated. Only one worker migrates at a time; the others skip it
+    rather than wait. Indexes are built CONCURRENTLY afterwards so writes
+    are never blocked. The latest_test_results rollup and item stats are
+    seeded from existing rows when empty.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cursor = conn.cursor()
+        # Session-level lock, released when the connection closes
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (RESULTS_MIGRATION_LOCK,))
+        if not cursor.fetchone()[0]:
+            conn.commit()
+            print("Test result migration is running in another worker, skipping")
+            return
+        conn.commit()
+        # Seed the latest-attempt rollup from results normalized before it existed
+        cursor.execute('''
+            INSERT INTO latest_test_results (username, test_id, result_id, score, passed, taken_at)
+            SELECT DISTINCT ON (username, test_id) username, test_id, result_id, score, passed, taken_at
+            FROM test_results
+            WHERE taken_at IS NOT NULL AND username IS NOT NULL AND test_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM latest_test_results)
+            ORDER BY username, test_id, taken_at DESC
+            ON CONFLICT (username, test_id) DO NOTHING
+        ''')
+        conn.commit()
+
+        migrated = 0
+        while True:
+            cursor.execute('''
+                SELECT result_id, data FROM test_results
+                WHERE taken_at IS NULL AND data IS NOT NULL
+                LIMIT %s FOR UPDATE SKIP LOCKED
+            ''', (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                conn.commit()
+                break
+            items = []
+            for result_id, data in rows:
+                result_data = json.loads(data)
+                if not result_data.get('timestamp'):
+                    result_data['timestamp'] = '1970-01-01T00:00:00'
+                items.append((result_id, result_data))
+            _write_test_results(cursor, items)
+            conn.commit()
+            migrated += len(rows)
+        if migrated:
+            print(f"Migrated {migrated} test results to normalized schema")
+
+        # Build item stats for results stored before item analysis existed
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM item_stats)')
+        if not cursor.fetchone()[0]:
+            recompute_item_stats(db=conn)
+
+        conn.autocommit = True
+        cursor.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS test_results_user_test_time_idx '
+                       'ON test_results (username, test_id, taken_at)')
+        cursor.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS test_results_test_time_idx '
+                       'ON test_results (test_id, taken_at)')
+        # Serves the admin dashboard's newest-results list
+        cursor.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS test_results_time_idx '
+                       'ON test_results (taken_at)')
+        # Keeps the readers' fallback query for unmigrated rows cheap
+        cursor.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS test_results_unmigrated_idx '
+                       'ON test_results (result_id) WHERE taken_at IS NULL')
+    finally:
+        conn.close()
 
 
 def get_custom_questions(test_id):
@@ -619,22 +1489,93 @@ def get_test_questions(test_id):
     return []
 
 
+# --- Test catalog cache ---
+#
+# Tests change rarely but are read on nearly every page, so each worker keeps
+# decoded tests in memory keyed by the per-test `version` column. Writers bump
+# the version and NOTIFY CATALOG_CHANNEL; every worker's listener marks its
+# cache stale, and the next read re-fetches only the tests whose version moved.
+
+_catalog = {}  # test_id -> {'version': int, 'test': dict, 'answer_key': AnswerKey}
+_catalog_lock = threading.Lock()
+_catalog_state = {'stale': True, 'checked_at': 0.0}
+
+
+def _copy_test(test):
+    """Copy a cached test so callers can mutate it without touching the cache."""
+    copied = dict(test)
+    copied['questions'] = [dict(q, options=list(q.get('options', [])))
+                           for q in test.get('questions', [])]
+    return copied
+
+
+def invalidate_test_catalog():
+    """Mark this worker's test catalog as needing a version check."""
+    _catalog_state['stale'] = True
+
+
+def _refresh_test_catalog():
+    """Reload tests whose version changed since they were cached."""
+    # Clear the flag before reading, so a NOTIFY that lands mid-refresh marks it stale again
+    with _catalog_lock:
+        _catalog_state['stale'] = False
+    try:
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute('SELECT test_id, version FROM tests')
+        versions = dict(cursor.fetchall())
+        changed = [tid for tid, version in versions.items()
+                   if _catalog.get(tid, {}).get('version') != version]
+        loaded = {}
+        if changed:
+            cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute('''
+                SELECT test_id, name, chapter, passing_score, version
+                FROM tests WHERE test_id = ANY(%s)
+            ''', (changed,))
+            for row in cursor.fetchall():
+                loaded[row['test_id']] = {
+                    'version': row['version'],
+                    'test': {
+                        'name': row['name'],
+                        'chapter': row['chapter'],
+                        'passing_score': row['passing_score'],
+                        'questions': []
+                    }
+                }
+            cursor.execute('''
+                SELECT * FROM questions WHERE test_id = ANY(%s) ORDER BY test_id, position
+            ''', (changed,))
+            for row in cursor.fetchall():
+                if row['test_id'] in loaded:
+                    loaded[row['test_id']]['test']['questions'].append(_question_from_row(row))
+            for entry in loaded.values():
+                entry['answer_key'] = compile_answer_key(entry['test']['questions'])
+    except Exception:
+        _catalog_state['stale'] = True
+        raise
+    with _catalog_lock:
+        for tid in list(_catalog):
+            if tid not in versions:
+                del _catalog[tid]
+        _catalog.update(loaded)
+        _catalog_state['checked_at'] = time.monotonic()
+
+
+def _get_test_catalog():
+    """Return the cached catalog, refreshing it first if it may be out of date."""
+    if (_catalog_state['stale']
+            or time.monotonic() - _catalog_state['checked_at'] > CATALOG_CACHE_TTL):
+        _refresh_test_catalog()
+    return _catalog
+
+
 def get_all_tests():
     """Get all tests from database, falling back to defaults if not seeded."""
     try:
-        db = get_db()
-        cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute('SELECT * FROM tests')
-        tests = {}
-        for row in cursor.fetchall():
-            tests[row['test_id']] = {
-                'name': row['name'],
-                'chapter': row['chapter'],
-                'passing_score': row['passing_score'],
-                'questions': json.loads(row['questions']) if row['questions'] else []
-            }
-        if tests:
-            return tests
+        catalog = _get_test_catalog()
+        if catalog:
+            return {tid: _copy_test(entry['test']) for tid, entry in catalog.items()}
     except Exception as e:
         print(f"Error loading tests from database: {e}")
     # Fallback to default tests
@@ -643,25 +1584,176 @@ def get_all_tests():
 
 def get_test(test_id):
     """Get a single test by ID."""
-    tests = get_all_tests()
-    return tests.get(test_id)
+    try:
+        catalog = _get_test_catalog()
+        if catalog:
+            entry = catalog.get(test_id)
+            return _copy_test(entry['test']) if entry else None
+    except Exception as e:
+        print(f"Error loading test {test_id} from database: {e}")
+    return DEFAULT_TESTS.get(test_id)
+
+
+def _question_from_row(row):
+    """Build a question dict from a questions table row."""
+    return {
+        'id': row['question_id'],
+        'question': row['question'],
+        'options': json.loads(row['options']),
+        'correct': row['correct'],
+        'correct_section': row['correct_section'],
+        'version': row['version']
+    }
 
 
-def save_test(test_id, test_data):
-    """Save a test to database."""
-    db = get_db()
-    cursor = db.cursor()
+def _write_test(cursor, test_id, test_data):
+    """Write a test and replace its question rows, bumping changed question versions."""
     cursor.execute('''
         INSERT INTO tests (test_id, name, chapter, passing_score, questions)
-        VALUES (%s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, NULL)
         ON CONFLICT (test_id) DO UPDATE SET
             name = EXCLUDED.name,
             chapter = EXCLUDED.chapter,
             passing_score = EXCLUDED.passing_score,
-            questions = EXCLUDED.questions
-    ''', (test_id, test_data['name'], test_data['chapter'],
-          test_data['passing_score'], json.dumps(test_data['questions'])))
+            questions = NULL,
+            version = tests.version + 1
+    ''', (test_id, test_data['name'], test_data['chapter'], test_data['passing_score']))
+    questions = test_data['questions']
+    cursor.execute('DELETE FROM questions WHERE test_id = %s AND NOT (question_id = ANY(%s))',
+                   (test_id, [q['id'] for q in questions]))
+    rows = [(test_id, q['id'], position, q['question'], json.dumps(q['options']),
+             q['correct'], q.get('correct_section', ''))
+            for position, q in enumerate(questions)]
+    if rows:
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO questions (test_id, question_id, position, question, options, correct, correct_section)
+            VALUES %s
+            ON CONFLICT (test_id, question_id) DO UPDATE SET
+                position = EXCLUDED.position,
+                question = EXCLUDED.question,
+                options = EXCLUDED.options,
+                correct = EXCLUDED.correct,
+                correct_section = EXCLUDED.correct_section,
+                version = questions.version + 1
+            WHERE (questions.position, questions.question, questions.options,
+                   questions.correct, questions.correct_section)
+                IS DISTINCT FROM (EXCLUDED.position, EXCLUDED.question, EXCLUDED.options,
+                                  EXCLUDED.correct, EXCLUDED.correct_section)
+        ''', rows)
+
+
+def get_grading_data(test_id):
+    """Get (test, answer_key) for grading, both from the same test version.
+
+    The returned test may be shared with the catalog cache and must not be
+    mutated. Returns (None, None) if the test does not exist.
+    """
+    try:
+        catalog = _get_test_catalog()
+        if catalog:
+            entry = catalog.get(test_id)
+            if not entry:
+                return None, None
+            if entry['test']['questions']:
+                return entry['test'], entry['answer_key']
+    except Exception as e:
+        print(f"Error loading test {test_id} from database: {e}")
+    # Fall back to default questions, as get_test_questions() does
+    test = get_test(test_id)
+    if test is None:
+        return None, None
+    test = dict(test, questions=get_test_questions(test_id))
+    return test, compile_answer_key(test['questions'])
+
+
+def save_test(test_id, test_data):
+    """Save a test to database and bump its catalog version."""
+    db = get_db()
+    cursor = db.cursor()
+    _write_test(cursor, test_id, test_data)
+    cursor.execute('SELECT pg_notify(%s, %s)', (CATALOG_CHANNEL, test_id))
+    db.commit()
+    invalidate_test_catalog()
+
+
+def get_question(test_id, question_id):
+    """Get a single question straight from the database (bypasses the catalog cache)."""
+    db = get_db()
+    cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor.execute('SELECT * FROM questions WHERE test_id = %s AND question_id = %s',
+                   (test_id, question_id))
+    row = cursor.fetchone()
+    return _question_from_row(row) if row else None
+
+
+QUESTION_UPDATE_FIELDS = ('question', 'options', 'correct', 'correct_section')
+
+
+def update_question(test_id, question_id, fields, expected_version):
+    """Update some fields of one question if it is still at `expected_version`.
+
+    Returns the question's new version, or None if someone else changed it
+    first (the caller should ask the user to reload).
+    """
+    assignments = []
+    params = []
+    for field, value in fields.items():
+        if field not in QUESTION_UPDATE_FIELDS:
+            raise ValueError(f'Cannot update question field: {field}')
+        assignments.append(f'{field} = %s')
+        params.append(json.dumps(value) if field == 'options' else value)
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(f'''
+        UPDATE questions SET {', '.join(assignments)}, version = version + 1
+        WHERE test_id = %s AND question_id = %s AND version = %s
+        RETURNING version
+    ''', (*params, test_id, question_id, expected_version))
+    row = cursor.fetchone()
+    if not row:
+        db.rollback()
+        return None
+    cursor.execute('UPDATE tests SET version = version + 1 WHERE test_id = %s', (test_id,))
+    cursor.execute('SELECT pg_notify(%s, %s)', (CATALOG_CHANNEL, test_id))
     db.commit()
+    invalidate_test_catalog()
+    return row[0]
+
+
+def _catalog_listener():
+    """Invalidate the catalog whenever another worker changes a test."""
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.autocommit = True
+            conn.cursor().execute(f'LISTEN {CATALOG_CHANNEL}')
+            # Changes made while we were disconnected were never delivered
+            invalidate_test_catalog()
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    invalidate_test_catalog()
+        except Exception as e:
+            print(f"[CATALOG] Listener error ({e}), retrying in 5s")
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(5)
+
+
+def start_catalog_listener():
+    """Start the background catalog invalidation listener for this worker."""
+    if not DATABASE_URL:
+        return
+    listener = threading.Thread(target=_catalog_listener, name='catalog-listener', daemon=True)
+    listener.start()
 
 
 def seed_tests_to_database():
@@ -676,12 +1768,15 @@ def safe_init_db():
     """Try to initialize database, but don't crash if unavailable."""
     try:
         init_db()
+        migrate_test_results()
         print("Database initialized successfully")
     except Exception as e:
         print(f"Warning: Database initialization failed: {e}")
         print("App will start but database features may not work until DB is available")
 
-safe_init_db()
+if APP_ROLE != 'scoring':
+    safe_init_db()
+    start_catalog_listener()
 
 
 def login_required(f):
@@ -765,8 +1860,7 @@ def get_proctor_tests(username, include_general=True):
 def get_proctor_results(username):
     """Get test results for tests in proctor's assigned categories."""
     available_tests = get_proctor_tests(username)
-    all_results = get_all_test_results()
-    return {rid: r for rid, r in all_results.items() if r['test_id'] in available_tests}
+    return get_all_test_results(test_ids=available_tests.keys())
 
 
 @app.route('/')
@@ -857,12 +1951,11 @@ def submit_test(test_id):
     if not has_role(session.get('role', ''), 'student'):
         return jsonify({'error': 'Unauthorized'}), 403
 
-    all_tests = get_all_tests()
-    if test_id not in all_tests:
+    test, answer_key = get_grading_data(test_id)
+    if test is None:
         return jsonify({'error': 'Test not found'}), 404
 
-    test = all_tests[test_id]
-    questions = get_test_questions(test_id)
+    questions = test['questions']
     passing_score = test['passing_score']
 
     data = request.json
@@ -870,44 +1963,9 @@ def submit_test(test_id):
     sections = data.get('sections', {})
 
     # Grade the test
-    total_points = 0
-    results = []
-
-    for q in questions:
-        q_id = str(q['id'])
-        user_answer = answers.get(q_id)
-        user_section_raw = sections.get(q_id, '')
-        user_section_normalized = normalize_section_ref(user_section_raw)
-        correct_section_normalized = normalize_section_ref(q['correct_section'])
-
-        is_correct = user_answer == q['correct']
-        is_section_correct = user_section_normalized == correct_section_normalized
-
-        # Calculate points for this question
-        # MC correct = 3.5 pts, Reference correct = 0.5 pts (max 4 pts per question)
-        question_points = 0
-        if is_correct:
-            question_points += 3.5  # Points for correct MC answer
-        if is_section_correct:
-            question_points += 0.5  # Points for correct reference
-
-        total_points += question_points
-
-        results.append({
-            'id': q['id'],
-            'question': q['question'],
-            'user_answer': user_answer,
-            'correct_answer': q['correct'],
-            'is_correct': is_correct,
-            'user_section': sections.get(q_id, ''),
-            'correct_section': q['correct_section'],
-            'is_section_correct': is_section_correct,
-            'question_points': question_points,
-            'options': q['options']
-        })
-
-    total_possible = len(questions) * 4  # 100 points
-    score = round((total_points / total_possible) * 100, 1)
+    results, total_points = grade_submission(questions, answer_key, answers, sections)
+    total_possible = answer_key.total_possible
+    score = compute_score(total_points, total_possible)
     passed = score >= passing_score
 
     # Store result in database
@@ -937,23 +1995,231 @@ def submit_test(test_id):
     })
 
 
-@app.route('/results/<result_id>')
-@login_required
-def view_results(result_id):
-    result = get_test_result(result_id)
-    if not result:
-        return "Results not found", 404
+# --- Batch grading (paper exams / offline sessions) ---
 
-    role = session.get('role', '')
+ANSWER_LETTERS = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
 
-    # Students can only view their own results
-    if has_role(role, 'student') and not has_role(role, 'proctor') and not has_role(role, 'admin') and result['username'] != session.get('user'):
-        return "Unauthorized", 403
 
-    # Proctors can only view results for their assigned categories
-    if has_role(role, 'proctor') and not has_role(role, 'admin'):
-        available_tests = get_proctor_tests(session.get('user'))
-        if result['test_id'] not in available_tests:
+def parse_answer_sheets(text, fmt='json'):
+    """Parse answer sheets from CSV, newline-delimited JSON or a JSON array.
+
+    CSV needs username, test_id, answers and sections columns, with answers
+    and sections as JSON objects keyed by question id; an optional timestamp
+    column records when the exam was sat.
+    """
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(text)))
+    if fmt == 'ndjson':
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    return data.get('sheets', []) if isinstance(data, dict) else data
+
+
+def _normalize_answer_sheet(sheet):
+    """Validate one answer sheet into (username, test_id, answers, sections, timestamp)."""
+    if not isinstance(sheet, dict):
+        raise ValueError('Each answer sheet must be an object')
+    username = str(sheet.get('username') or '').strip().lower()
+    test_id = str(sheet.get('test_id') or '').strip()
+    if not username or not test_id:
+        raise ValueError('username and test_id are required')
+
+    raw_answers = sheet.get('answers') or {}
+    raw_sections = sheet.get('sections') or {}
+    try:
+        if isinstance(raw_answers, str):
+            raw_answers = json.loads(raw_answers)
+        if isinstance(raw_sections, str):
+            raw_sections = json.loads(raw_sections)
+    except ValueError:
+        raise ValueError('answers and sections must be JSON objects')
+    if not isinstance(raw_answers, dict) or not isinstance(raw_sections, dict):
+        raise ValueError('answers and sections must be objects keyed by question id')
+
+    answers = {}
+    for q_id, value in raw_answers.items():
+        if value is None or value == '':
+            continue
+        if isinstance(value, str):
+            value = value.strip().upper()
+            value = ANSWER_LETTERS.get(value, value)
+        try:
+            answers[str(q_id)] = int(value)
+        except (ValueError, TypeError):
+            raise ValueError(f'Invalid answer for question {q_id}: {value!r}')
+    sections = {str(q_id): str(value or '').strip() for q_id, value in raw_sections.items()}
+
+    timestamp = sheet.get('timestamp') or datetime.now().isoformat()
+    try:
+        datetime.fromisoformat(timestamp)
+    except (ValueError, TypeError):
+        raise ValueError(f'Invalid timestamp: {timestamp!r}')
+    return username, test_id, answers, sections, timestamp
+
+
+def _grade_sheet_groups(groups, processes=False):
+    """Grade {test_id: (test, answer_key, [(answers, sections), ...])}.
+
+    With `processes`, large batches are spread over a process pool. Web
+    workers grade in-process instead, in chunks that yield between them:
+    waiting on child pipes would stall the gevent hub, and spawned children
+    would re-import the app when it runs as __main__.
+    """
+    total = sum(len(sheets) for _, _, sheets in groups.values())
+    graded = {}
+    if processes and total >= BATCH_GRADE_POOL_MIN and BATCH_GRADE_WORKERS > 1:
+        ctx = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=BATCH_GRADE_WORKERS, mp_context=ctx) as pool:
+            futures = []
+            for test_id, (test, answer_key, sheets) in groups.items():
+                for start in range(0, len(sheets), BATCH_GRADE_CHUNK):
+                    chunk = sheets[start:start + BATCH_GRADE_CHUNK]
+                    futures.append((test_id, pool.submit(grade_sheets, test['questions'], answer_key, chunk)))
+            for test_id, future in futures:
+                graded.setdefault(test_id, []).extend(future.result())
+        return graded
+
+    for test_id, (test, answer_key, sheets) in groups.items():
+        graded[test_id] = []
+        for start in range(0, len(sheets), BATCH_GRADE_CHUNK):
+            chunk = sheets[start:start + BATCH_GRADE_CHUNK]
+            graded[test_id].extend(grade_sheets(test['questions'], answer_key, chunk))
+            time.sleep(0)  # let other greenlets run between chunks
+    return graded
+
+
+def grade_answer_sheets(sheets, allowed_tests=None, processes=False):
+    """Grade many answer sheets with submit_test's logic and store them in one transaction.
+
+    `allowed_tests` limits which tests may be graded (None = any) and
+    `processes` allows grading in a process pool (see _grade_sheet_groups).
+    Returns a per-row report in input order; rows that fail validation are
+    reported and skipped without affecting the rest of the batch.
+    """
+    report = []
+    valid = []
+    for row, sheet in enumerate(sheets, 1):
+        fields = sheet if isinstance(sheet, dict) else {}
+        entry = {'row': row, 'username': fields.get('username'), 'test_id': fields.get('test_id')}
+        report.append(entry)
+        try:
+            valid.append((entry, *_normalize_answer_sheet(sheet)))
+        except ValueError as e:
+            entry.update(status='error', error=str(e))
+
+    db = get_db()
+    cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor.execute('SELECT username, name, role FROM users WHERE username = ANY(%s)',
+                   (list({v[1] for v in valid}),))
+    users = {row['username']: row for row in cursor.fetchall()}
+    tests = {test_id: get_grading_data(test_id) for test_id in {v[2] for v in valid}}
+
+    groups = {}
+    accepted = {}
+    for entry, username, test_id, answers, sections, timestamp in valid:
+        user = users.get(username)
+        test, answer_key = tests[test_id]
+        if not user or not has_role(user['role'], 'student'):
+            entry.update(status='error', error='Unknown student')
+        elif test is None:
+            entry.update(status='error', error='Test not found')
+        elif allowed_tests is not None and test_id not in allowed_tests:
+            entry.update(status='error', error='Unauthorized for this test')
+        else:
+            groups.setdefault(test_id, (test, answer_key, []))[2].append((answers, sections))
+            accepted.setdefault(test_id, []).append((entry, user, timestamp))
+
+    graded = _grade_sheet_groups(groups, processes=processes)
+
+    items = []
+    for test_id, rows in accepted.items():
+        test, answer_key, _ = groups[test_id]
+        for (entry, user, timestamp), (results, total_points) in zip(rows, graded[test_id]):
+            score = compute_score(total_points, answer_key.total_possible)
+            passed = score >= test['passing_score']
+            # Full uuid: a batch can hold thousands of rows, too many for 8-char ids
+            result_id = uuid.uuid4().hex
+            items.append((result_id, {
+                'student': user['name'],
+                'username': user['username'],
+                'test_id': test_id,
+                'test_name': test['name'],
+                'score': score,
+                'total_points': total_points,
+                'total_possible': answer_key.total_possible,
+                'total_questions': len(test['questions']),
+                'passing_score': test['passing_score'],
+                'passed': passed,
+                'timestamp': timestamp,
+                'results': results
+            }))
+            entry.update(status='graded', result_id=result_id, score=score, passed=passed)
+
+    try:
+        _write_test_results(db.cursor(), items)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        for entry in report:
+            if entry.get('status') == 'graded':
+                entry.update(status='error', error=f'Not saved: {e}')
+                for key in ('result_id', 'score', 'passed'):
+                    entry.pop(key, None)
+    return report
+
+
+@app.route('/proctor/batch-grade', methods=['POST'])
+@proctor_required
+def batch_grade():
+    """Grade a batch of paper answer sheets (JSON, NDJSON or CSV)."""
+    upload = request.files.get('file')
+    if upload:
+        text = upload.read().decode('utf-8-sig')
+        name = (upload.filename or '').lower()
+        fmt = 'csv' if name.endswith('.csv') else 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'json'
+    else:
+        text = request.get_data(as_text=True)
+        fmt = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}.get(request.mimetype, 'json')
+    try:
+        sheets = parse_answer_sheets(text, fmt)
+    except (ValueError, csv.Error) as e:
+        return jsonify({'error': f'Could not parse answer sheets: {e}'}), 400
+    if not isinstance(sheets, list) or not all(isinstance(sheet, dict) for sheet in sheets):
+        return jsonify({'error': 'Expected a list of answer sheets'}), 400
+    if len(sheets) > BATCH_GRADE_MAX_SHEETS:
+        return jsonify({'error': f'At most {BATCH_GRADE_MAX_SHEETS} sheets per batch'}), 400
+
+    allowed_tests = None
+    if not has_role(session.get('role', ''), 'admin'):
+        allowed_tests = set(get_proctor_tests(session.get('user')))
+
+    report = grade_answer_sheets(sheets, allowed_tests=allowed_tests)
+    graded = sum(1 for entry in report if entry.get('status') == 'graded')
+    return jsonify({
+        'success': True,
+        'graded': graded,
+        'errors': len(report) - graded,
+        'report': report
+    })
+
+
+@app.route('/results/<result_id>')
+@login_required
+def view_results(result_id):
+    result = get_test_result(result_id)
+    if not result:
+        return "Results not found", 404
+
+    role = session.get('role', '')
+
+    # Students can only view their own results
+    if has_role(role, 'student') and not has_role(role, 'proctor') and not has_role(role, 'admin') and result['username'] != session.get('user'):
+        return "Unauthorized", 403
+
+    # Proctors can only view results for their assigned categories
+    if has_role(role, 'proctor') and not has_role(role, 'admin'):
+        available_tests = get_proctor_tests(session.get('user'))
+        if result['test_id'] not in available_tests:
             return "Unauthorized", 403
 
     # Check if examiner can approve references (non-passing tests only)
@@ -1004,7 +2270,7 @@ def approve_reference(result_id):
     # Recalculate total score
     total_points = sum(r.get('question_points', 0) for r in result['results'])
     total_possible = result.get('total_possible', len(result['results']) * 4)
-    new_score = round((total_points / total_possible) * 100, 1)
+    new_score = compute_score(total_points, total_possible)
     passing_score = result.get('passing_score', 70)
 
     result['total_points'] = total_points
@@ -1039,23 +2305,18 @@ def proctor_dashboard():
     all_users = get_all_users()
     students = {u: data for u, data in all_users.items() if has_role(data, 'student')}
 
-    # Add test status to each student
-    all_results = get_all_test_results()
+    # Add test status to each student (most recent result for each test)
+    latest_results = get_latest_test_results(students.keys())
     for student_username, student_data in students.items():
-        # Build test_results dict with most recent result for each test
         test_results = {}
-        for result_id, result in all_results.items():
-            if result.get('username') == student_username:
-                test_id = result.get('test_id')
-                # Keep the most recent result for each test
-                if test_id not in test_results or result.get('timestamp', '') > test_results[test_id].get('timestamp', ''):
-                    test_results[test_id] = {
-                        'score': result.get('score'),
-                        'passed': result.get('passed'),
-                        'chapter': available_tests.get(test_id, {}).get('chapter', ''),
-                        'result_id': result_id,
-                        'timestamp': result.get('timestamp', '')
-                    }
+        for test_id, result in latest_results.get(student_username, {}).items():
+            test_results[test_id] = {
+                'score': result['score'],
+                'passed': result['passed'],
+                'chapter': available_tests.get(test_id, {}).get('chapter', ''),
+                'result_id': result['result_id'],
+                'timestamp': result['timestamp']
+            }
         student_data['test_results'] = test_results
         student_data['tests_completed'] = len(test_results)
         student_data['tests_assigned'] = len(student_data.get('assigned_tests', []))
@@ -1244,23 +2505,21 @@ def admin_dashboard():
     proctors = {u: data for u, data in all_users.items() if has_role(data, 'proctor')}
     students = {u: data for u, data in all_users.items() if has_role(data, 'student')}
     jwg_members = {u: data for u, data in all_users.items() if has_role(data, 'jwg')}
-    all_results = get_all_test_results()
+    recent_results = get_recent_test_results(ADMIN_RECENT_RESULTS)
+    total_results, passed_results = count_test_results()
     all_tests = get_all_tests()
 
-    # Attach test results to each student
+    # Attach each student's most recent result for each test
+    latest_results = get_latest_test_results(students.keys())
     for username, student in students.items():
         student_results = {}
-        for result_id, result in all_results.items():
-            if result.get('username') == username:
-                test_id = result.get('test_id')
-                # Keep the most recent result for each test
-                if test_id not in student_results or result.get('timestamp', '') > student_results[test_id].get('timestamp', ''):
-                    student_results[test_id] = {
-                        'score': result.get('score'),
-                        'passed': result.get('passed'),
-                        'chapter': all_tests.get(test_id, {}).get('chapter', ''),
-                        'result_id': result_id
-                    }
+        for test_id, result in latest_results.get(username, {}).items():
+            student_results[test_id] = {
+                'score': result['score'],
+                'passed': result['passed'],
+                'chapter': all_tests.get(test_id, {}).get('chapter', ''),
+                'result_id': result['result_id']
+            }
         student['test_results'] = student_results
 
     # Separate examiners (E-level) from trainers (N/R-level)
@@ -1318,7 +2577,9 @@ def admin_dashboard():
                          students=students,
                          jwg_members=jwg_members,
                          categories=CATEGORIES,
-                         results=all_results,
+                         results=recent_results,
+                         total_results=total_results,
+                         passed_results=passed_results,
                          tests=all_tests,
                          needs_seeding=needs_seeding,
                          needs_migration=needs_migration,
@@ -1498,6 +2759,32 @@ def admin_seed_tests():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/admin/regrade/<test_id>', methods=['POST'])
+@admin_required
+def admin_regrade_test(test_id):
+    """Regrade stored results for a test after its answer key changed.
+
+    Defaults to a dry run that only reports what would change; send
+    {"dry_run": false} to apply it.
+    """
+    data = request.json or {}
+    dry_run = data.get('dry_run', True) is not False
+    report = regrade_test_results(test_id, dry_run=dry_run)
+    if report is None:
+        return jsonify({'error': 'Test not found'}), 404
+    return jsonify({'success': True, 'report': report})
+
+
+@app.route('/admin/item-stats/recompute', methods=['POST'])
+@admin_required
+def admin_recompute_item_stats():
+    """Rebuild item statistics from all stored results (or {"test_id": ...} only)."""
+    data = request.json or {}
+    test_id = data.get('test_id')
+    answers = recompute_item_stats([test_id] if test_id else None)
+    return jsonify({'success': True, 'answers': answers})
+
+
 @app.route('/admin/get-tests')
 @admin_required
 def admin_get_tests():
@@ -1559,9 +2846,11 @@ def jwg_dashboard():
     all_tests = get_all_tests()
     verifications = get_question_verifications()
     flags = get_question_flags()
+    item_stats = get_item_stats()
 
-    # Calculate verification and flag stats per test
+    # Calculate verification, flag and item analysis stats per test
     total_flagged = 0
+    total_review = 0
     test_stats = {}
     for test_id, test_data in all_tests.items():
         questions = test_data.get('questions', [])
@@ -1569,13 +2858,18 @@ def jwg_dashboard():
         verified = sum(1 for q in questions if f"{test_id}_{q['id']}" in verifications)
         flag_count = sum(1 for q in questions if f"{test_id}_{q['id']}" in flags)
         total_flagged += flag_count
+        items = item_stats.get(test_id, {})
+        review_count = sum(1 for item in items.values() if item['review'])
+        total_review += review_count
         test_stats[test_id] = {
             'name': test_data['name'],
             'chapter': test_data['chapter'],
             'total': total,
             'verified': verified,
             'percent': round((verified / total * 100) if total > 0 else 0, 1),
-            'flagged': flag_count
+            'flagged': flag_count,
+            'review': review_count,
+            'attempts': max((item['attempts'] for item in items.values()), default=0)
         }
 
     return render_template('jwg.html',
@@ -1584,7 +2878,8 @@ def jwg_dashboard():
                          user=session.get('user'),
                          name=session.get('name'),
                          is_admin=has_role(session.get('role', ''), 'admin'),
-                         total_flagged=total_flagged)
+                         total_flagged=total_flagged,
+                         total_review=total_review)
 
 
 @app.route('/jwg/verify/<test_id>')
@@ -1599,9 +2894,11 @@ def jwg_verify_test(test_id):
     questions = test.get('questions', [])
     verifications = get_question_verifications(test_id)
     flags = get_question_flags(test_id)
+    item_stats = get_item_stats(test_id).get(test_id, {})
 
-    # Add verification and flag status to each question
+    # Add verification, flag status and item statistics to each question
     for q in questions:
+        q['stats'] = item_stats.get(q['id'])
         key = f"{test_id}_{q['id']}"
         if key in verifications:
             q['verified'] = True
@@ -1696,39 +2993,28 @@ def jwg_update_question():
     new_reference = data.get('correct_section')
     new_correct = data.get('correct')  # Index of correct answer
     new_options = data.get('options')  # List of 4 options
+    expected_version = data.get('version')  # Question version the reviewer edited
 
     if not test_id or question_id is None:
         return jsonify({'error': 'test_id and question_id are required'}), 400
 
-    # Get the test
-    all_tests = get_all_tests()
-    if test_id not in all_tests:
-        return jsonify({'error': 'Test not found'}), 404
-
-    test = all_tests[test_id]
-    questions = test.get('questions', [])
-
-    # Find the question and compute diff
-    target_q = None
-    for q in questions:
-        if q['id'] == question_id:
-            target_q = q
-            break
-
+    # Read just this question, fresh from the database
+    target_q = get_question(test_id, question_id)
     if not target_q:
         return jsonify({'error': 'Question not found'}), 404
 
     # Compute changes (old vs new)
     changes = {}
+    fields = {}
     if new_question and new_question != target_q.get('question'):
         changes['question'] = {'old': target_q['question'], 'new': new_question}
-        target_q['question'] = new_question
+        fields['question'] = new_question
     if new_reference and new_reference != target_q.get('correct_section'):
         changes['correct_section'] = {'old': target_q.get('correct_section', ''), 'new': new_reference}
-        target_q['correct_section'] = new_reference
+        fields['correct_section'] = new_reference
     if new_correct is not None and new_correct != target_q.get('correct'):
         changes['correct'] = {'old': target_q['correct'], 'new': new_correct}
-        target_q['correct'] = new_correct
+        fields['correct'] = new_correct
     if new_options and len(new_options) == 4 and new_options != target_q.get('options'):
         old_options = target_q.get('options', [])
         option_changes = {}
@@ -1737,14 +3023,16 @@ def jwg_update_question():
                 option_changes[str(i)] = {'old': old_opt, 'new': new_opt}
         if option_changes:
             changes['options'] = option_changes
-        target_q['options'] = new_options
+        fields['options'] = new_options
 
     if not changes:
-        return jsonify({'success': True, 'message': 'No changes detected'})
+        return jsonify({'success': True, 'message': 'No changes detected', 'version': target_q['version']})
 
-    # Save the updated test
-    test['questions'] = questions
-    save_test(test_id, test)
+    # Only write if nobody else changed the question since this reviewer loaded it
+    expected_version = target_q['version'] if expected_version is None else expected_version
+    new_version = update_question(test_id, question_id, fields, expected_version)
+    if new_version is None:
+        return jsonify({'error': 'This question was changed by someone else. Reload the page to see the latest version.'}), 409
 
     # Record the change for audit trail
     username = session.get('user')
@@ -1755,7 +3043,10 @@ def jwg_update_question():
     return jsonify({
         'success': True,
         'message': 'Question updated successfully',
-        'updated_by': name
+        'updated_by': name,
+        'version': new_version,
+        # Stored results still carry the old grading until an admin regrades
+        'regrade_needed': 'correct' in changes or 'correct_section' in changes
     })
 
 
@@ -1981,6 +3272,54 @@ PANEL_SIZES = {
     'cp-freestyle': 5, 'fs-points': 5, 'cf-points': 5, 'ae-score': 5,
 }
 
+# --- Scoring shards ---
+#
+# Rooms can be served by dedicated scoring processes (scoring_server.py).
+# SCORING_SHARD_URLS lists each process's public base URL; a room is owned by
+# the one its code hashes to on a consistent-hash ring, and its judges'
+# sockets connect there. Adding a shard only moves about 1/N of the rooms.
+# SCORING_SHARD_URL is this process's own entry, so it can send clients of
+# rooms it doesn't own to the right one. Redis (message_queue) carries
+# broadcasts between processes, e.g. a video attached from the web app.
+SCORING_SHARD_URLS = [url.strip().rstrip('/') for url in os.environ.get('SCORING_SHARD_URLS', '').split(',')
+                      if url.strip()]
+SCORING_SHARD_URL = os.environ.get('SCORING_SHARD_URL', '').rstrip('/')
+
+
+class ConsistentHashRing:
+    """Map keys to nodes so that adding or removing a node moves few keys."""
+
+    def __init__(self, nodes, replicas=100):
+        self._ring = sorted((self._hash(f'{node}#{i}'), node) for node in nodes for i in range(replicas))
+        self._hashes = [h for h, _ in self._ring]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+    def node_for(self, key):
+        i = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._ring[i][1]
+
+
+_scoring_ring = ConsistentHashRing(SCORING_SHARD_URLS) if SCORING_SHARD_URLS else None
+
+
+def scoring_shard_url(room_code):
+    """Base URL of the scoring process owning a room, or None when not sharded."""
+    return _scoring_ring.node_for(room_code) if _scoring_ring else None
+
+
+if APP_ROLE == 'scoring':
+    @app.before_request
+    def _scoring_routes_only():
+        """A scoring server answers nothing but live scoring."""
+        if request.endpoint == 'results_snapshot_file':
+            return None
+        if not request.path.startswith(('/scoring/', '/socket.io', '/static/')):
+            return jsonify({'error': 'Not found'}), 404
+
+
 # --- Redis setup ---
 
 import redis as redis_lib
@@ -1999,11 +3338,25 @@ if REDIS_URL:
         redis_client = None
         print(f"[REDIS] Connection failed ({e}), using in-memory fallback")
 
+# Without Redis, the workers on one host share rooms through a SQLite file
+# and relay Socket.IO broadcasts over Unix sockets (see local_store.py).
+# Set WS_LOCAL_STORE to an empty string to keep rooms per process instead.
+WS_LOCAL_STORE = os.environ.get('WS_LOCAL_STORE', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'ws_scoring_rooms.db'))
+WS_LOCAL_BUS_DIR = os.environ.get('WS_LOCAL_BUS_DIR', WS_LOCAL_STORE + '.bus')
+
 # --- SocketIO setup ---
 
 try:
     from flask_socketio import SocketIO, emit, join_room, leave_room
     _async_mode = 'gevent' if 'gunicorn' in sys.modules else 'threading'
+    _socketio_options = {}
+    if not REDIS_AVAILABLE and WS_LOCAL_STORE:
+        try:
+            from local_store import LocalBusManager
+            _socketio_options['client_manager'] = LocalBusManager(WS_LOCAL_BUS_DIR)
+        except OSError as e:
+            print(f"[SOCKETIO] Local bus unavailable ({e}), broadcasts stay within each worker")
     socketio = SocketIO(
         app,
         cors_allowed_origins="*",
@@ -2013,155 +3366,981 @@ try:
         ping_interval=25,
         logger=False,
         engineio_logger=False,
+        **_socketio_options,
     )
     SOCKETIO_ENABLED = True
-    print(f"[SOCKETIO] Enabled (async_mode={_async_mode}, redis={'yes' if REDIS_AVAILABLE else 'no'})")
+    print(f"[SOCKETIO] Enabled (async_mode={_async_mode}, redis={'yes' if REDIS_AVAILABLE else 'no'}, "
+          f"local bus={'yes' if _socketio_options else 'no'})")
 except ImportError:
     SOCKETIO_ENABLED = False
     socketio = None
     print("[SOCKETIO] Disabled (flask-socketio not installed)")
 
-# --- Room storage with Redis + in-memory fallback ---
-
-WS_ROOMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ws_scoring_rooms.json')
+# --- Room storage: Redis, else a SQLite store shared by local workers, else in-memory ---
+#
+# In Redis a room is four hashes, so a score or a judge's status is a single
+# field write rather than a rewrite of the whole room:
+#   ws_room:{code}             room settings (scoring_type, state, panel_size, ...)
+#   ws_room:{code}:judges      "{judge_num}:{attr}" -> name / sid / confirmed
+#   ws_room:{code}:scores      "{judge_num}:{field}" -> value
+#   ws_room:{code}:completion  "{judge_num}" -> list of fields still missing
+# Values are JSON-encoded. The ws_rooms set lists every room code.
+#
+# Every change bumps the room's `seq` in the same atomic step, and
+# broadcasts carry it so clients can spot a missed update and resync.
+# Completion (missing fields per judge, plus the room's `complete_judges`
+# count) is updated alongside each score write rather than recomputed; a
+# judge with no completion entry is missing every field.
+
+WS_ROOMS_FILE = os.environ.get('WS_ROOMS_FILE', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'ws_scoring_rooms.json'))
+WS_ROOMS_KEY = 'ws_rooms'
 _ws_rooms_memory = {}
+_ws_local_store = None  # LocalRoomStore when running without Redis
+
+# Without Redis, rooms are persisted as a snapshot (WS_ROOMS_FILE) plus an
+# append-only journal of changes since it was written. The journal is folded
+# into a fresh snapshot every WS_JOURNAL_COMPACT_OPS changes.
+WS_ROOMS_JOURNAL = os.path.splitext(WS_ROOMS_FILE)[0] + '.journal'
+WS_JOURNAL_COMPACT_OPS = int(os.environ.get('WS_JOURNAL_COMPACT_OPS', 1000))
+_ws_journal = None
+_ws_journal_ops = 0
+
+# sid -> (room_code, judge_num) for connected judges; mirrored in Redis as
+# ws_sid:{sid} keys that expire in case a worker dies without cleaning up
+WS_SID_TTL = 24 * 3600
+_ws_sid_index = {}
+
+# Judge presence lives outside the room: ws_presence:{code}:{judge_num} holds
+# the seat's sid and expires unless the judge's page keeps sending
+# heartbeats. A judge's `connected` flag is whether that key exists, so it
+# needs no reset at boot and stays right when a worker restarts or dies.
+WS_PRESENCE_TTL = int(os.environ.get('WS_PRESENCE_TTL', 45))
+WS_HEARTBEAT_INTERVAL = int(os.environ.get('WS_HEARTBEAT_INTERVAL', 15))
+# (room_code, judge_num) -> (sid, expires_at), fallback mode
+_ws_presence = {}
+
+# Spectators (venue screens, announcers) get a read-only scoreboard, pushed
+# at most SPECTATOR_MAX_HZ times a second per room however many changes
+# happen in between. Each push is serialized once and sent to the whole
+# spectate:{code} Socket.IO room.
+SPECTATOR_MAX_HZ = float(os.environ.get('SPECTATOR_MAX_HZ', 2))
+_ws_spectator_dirty = set()
+_ws_spectator_task = None
+
+# Standings: each finalized round adds the panel's aggregated total
+# (aggregation.py) to the competitor's cumulative score and records it as
+# their round N. Both are kept sorted - Redis sorted sets
+# ws_standings:{code} and ws_standings:{code}:r{n}, with ws_standings:{code}:rounds
+# counting rounds per competitor - so a leaderboard read never re-adds
+# every round. AGGREGATION_RULES (JSON, {scoring_type: {"combine",
+# "weights", "decimals"}}) overrides the built-in rules for an event.
+STANDINGS_BROADCAST_TOP = int(os.environ.get('STANDINGS_BROADCAST_TOP', 10))
+# code -> {'totals': {competitor: total}, 'rounds': {competitor: n}, 'by_round': {n: {competitor: total}}}
+_ws_standings = {}
+for _scoring_type, _rule in json.loads(os.environ.get('AGGREGATION_RULES') or '{}').items():
+    register_rule(_scoring_type, rule_from_dict(_rule))
+
+# Mark mode: for these scoring types a judge may tap marks against the video
+# time (scoring_marks.py) and the named field is derived from them. Each
+# judge's marks are a Redis sorted set ws_marks:{code}:{judge_num}, kept
+# apart from the room so snapshots only carry them for mark types. Batches
+# are broadcast as deltas; clients keep their own copy of each timeline.
+MARK_SCORING_TYPES = {'fs-points': 'points', 'cf-points': 'points'}
+MAX_MARKS_PER_JUDGE = 500
+WS_MARKS_TTL = 24 * 3600  # marks of an abandoned round eventually go away
+# code -> {judge_num: sorted marks}, fallback mode
+_ws_marks = {}
+
+# Atomically write score fields for one judge if the room state allows it,
+# then update that judge's completion and the room's complete-judge count.
+# KEYS: room, judges, scores, completion. ARGV: mode ('open' = not locked,
+# 'scoring' = scoring only), judge_num, confirm ('1' replaces the judge's
+# scores and marks them confirmed), the number of required fields followed
+# by (field, min, max) for each, then field/value pairs. Returns -1 (no
+# room), 0 (state doesn't allow it) or {new seq, missing fields as JSON,
+# complete_judges}.
+_WS_SCORE_SCRIPT = '''
+local state = redis.call('HGET', KEYS[1], 'state')
+if not state then return -1 end
+if ARGV[1] == 'scoring' and state ~= '"scoring"' then return 0 end
+if ARGV[1] == 'open' and state == '"complete"' then return 0 end
+local judge = ARGV[2]
+local prefix = judge .. ':'
+if ARGV[3] == '1' then
+    for _, f in ipairs(redis.call('HKEYS', KEYS[3])) do
+        if string.sub(f, 1, #prefix) == prefix then redis.call('HDEL', KEYS[3], f) end
+    end
+    redis.call('HSET', KEYS[2], prefix .. 'confirmed', 'true')
+end
+local values_from = 5 + 3 * tonumber(ARGV[4])
+for i = values_from, #ARGV, 2 do
+    redis.call('HSET', KEYS[3], prefix .. ARGV[i], ARGV[i + 1])
+end
+local missing = {}
+for i = 5, values_from - 1, 3 do
+    local value = tonumber(redis.call('HGET', KEYS[3], prefix .. ARGV[i]) or '')
+    if not value or value < tonumber(ARGV[i + 1]) or value > tonumber(ARGV[i + 2]) then
+        missing[#missing + 1] = ARGV[i]
+    end
+end
+local encoded = '[]'
+if #missing > 0 then encoded = cjson.encode(missing) end
+local was_complete = redis.call('HGET', KEYS[4], judge) == '[]'
+redis.call('HSET', KEYS[4], judge, encoded)
+if was_complete ~= (#missing == 0) then
+    redis.call('HINCRBY', KEYS[1], 'complete_judges', (#missing == 0) and 1 or -1)
+end
+local seq = redis.call('HINCRBY', KEYS[1], 'seq', 1)
+return {seq, encoded, tonumber(redis.call('HGET', KEYS[1], 'complete_judges') or '0')}
+'''
+_ws_score_script = redis_client.register_script(_WS_SCORE_SCRIPT) if redis_client else None
+
+# Refresh a judge's presence key if the socket still holds the seat.
+# KEYS: presence, judges. ARGV: sid, ttl, judge_num, JSON-encoded sid.
+# Returns 0 (seat belongs to another socket), 1 (refreshed) or 2 (the key
+# had expired, so the judge just came back).
+_WS_PRESENCE_SCRIPT = '''
+if redis.call('HGET', KEYS[2], ARGV[3] .. ':sid') ~= ARGV[4] then return 0 end
+local present = redis.call('EXISTS', KEYS[1])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 2 - present
+'''
+_ws_presence_script = redis_client.register_script(_WS_PRESENCE_SCRIPT) if redis_client else None
+
+# Delete a presence key only if it still belongs to the given sid.
+_WS_ABSENCE_SCRIPT = '''
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+'''
+_ws_absence_script = redis_client.register_script(_WS_ABSENCE_SCRIPT) if redis_client else None
+
+# Claim a round for finalizing: move the room from scoring/complete to
+# finalizing, only if its seq is still the one the caller checked.
+# KEYS: room. ARGV: expected seq, then field/JSON-value pairs to set.
+# Returns the new seq, or 0 if the room changed or is already finalizing.
+_WS_CLAIM_SCRIPT = '''
+local state = redis.call('HGET', KEYS[1], 'state')
+if state ~= '"scoring"' and state ~= '"complete"' then return 0 end
+if tonumber(redis.call('HGET', KEYS[1], 'seq') or '0') ~= tonumber(ARGV[1]) then return 0 end
+redis.call('HSET', KEYS[1], 'state', '"finalizing"')
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return redis.call('HINCRBY', KEYS[1], 'seq', 1)
+'''
+_ws_claim_script = redis_client.register_script(_WS_CLAIM_SCRIPT) if redis_client else None
+
+
+def _ws_room_keys(code):
+    """Redis keys holding a room: (settings, judges, scores, completion)."""
+    return (f'ws_room:{code}', f'ws_room:{code}:judges', f'ws_room:{code}:scores',
+            f'ws_room:{code}:completion')
+
+
+def _ws_missing_fields(scoring_type, judge_scores):
+    """Required fields a judge has not filled in with an in-range value."""
+    missing = []
+    for field, (min_val, max_val) in WS_SCORE_FIELDS.get(scoring_type, {}).items():
+        v = judge_scores.get(field)
+        if v is None:
+            missing.append(field)
+        elif v < min_val or v > max_val:
+            missing.append(field)
+    return missing
+
+
+def _ws_completion_state(room):
+    """Completion computed from scratch: ({judge_num: missing fields}, complete judge count).
+
+    Only used for whole-room writes; score writes update it incrementally.
+    """
+    completion = {j: _ws_missing_fields(room['scoring_type'], room.get('scores', {}).get(j, {}))
+                  for j in range(1, room.get('panel_size', 3) + 1)}
+    return completion, sum(1 for missing in completion.values() if not missing)
+
+
+def _decode_ws_room(meta, judges, scores, completion):
+    """Assemble a room dict from its Redis hashes."""
+    room = {k: json.loads(v) for k, v in meta.items()}
+    room['completion'] = {int(j): json.loads(v) for j, v in completion.items()}
+    room['judges'] = {}
+    for key, value in judges.items():
+        j, attr = key.split(':', 1)
+        room['judges'].setdefault(int(j), {})[attr] = json.loads(value)
+    room['scores'] = {j: {} for j in range(1, room.get('panel_size', 3) + 1)}
+    for key, value in scores.items():
+        j, field = key.split(':', 1)
+        room['scores'].setdefault(int(j), {})[field] = json.loads(value)
+    return room
+
+
+def _write_ws_room(pipe, code, room):
+    """Queue commands replacing a room's hashes with the given room dict."""
+    room_key, judges_key, scores_key, completion_key = _ws_room_keys(code)
+    completion, room['complete_judges'] = _ws_completion_state(room)
+    meta = {k: json.dumps(v) for k, v in room.items() if k not in ('judges', 'scores', 'completion', 'video')}
+    judges = {f'{j}:{attr}': json.dumps(value)
+              for j, judge in room.get('judges', {}).items() for attr, value in judge.items()}
+    scores = {f'{j}:{field}': json.dumps(value)
+              for j, fields in room.get('scores', {}).items() for field, value in fields.items()}
+    pipe.delete(room_key, judges_key, scores_key, completion_key)
+    pipe.hset(room_key, mapping=meta)
+    if judges:
+        pipe.hset(judges_key, mapping=judges)
+    if scores:
+        pipe.hset(scores_key, mapping=scores)
+    pipe.hset(completion_key, mapping={str(j): json.dumps(missing) for j, missing in completion.items()})
+    pipe.sadd(WS_ROOMS_KEY, code)
+    room['completion'] = completion
+
+
+def _ws_room_from_json(room):
+    """Restore int judge numbers in a room decoded from JSON."""
+    room['scores'] = {int(k): v for k, v in room.get('scores', {}).items()}
+    room['judges'] = {int(k): v for k, v in room.get('judges', {}).items()}
+    if 'completion' in room:
+        room['completion'] = {int(k): v for k, v in room['completion'].items()}
+    return room
+
+
+def _apply_ws_op(rooms, op):
+    """Apply one journaled room change to an in-memory rooms dict.
+
+    Ops carry the resulting seq rather than an increment, so replaying an
+    op the snapshot already contains is harmless.
+    """
+    code = op['code']
+    kind = op['op']
+    if kind == 'set':
+        room = op['room']
+        room['completion'], room['complete_judges'] = _ws_completion_state(room)
+        rooms[code] = room
+        return
+    if kind == 'del':
+        rooms.pop(code, None)
+        return
+    room = rooms.get(code)
+    if room is None:
+        return
+    if kind in ('room', 'clear'):
+        for field, value in op.get('fields', {}).items():
+            if value is None:
+                room.pop(field, None)
+            else:
+                room[field] = value
+    if kind == 'judge':
+        room.setdefault('judges', {}).setdefault(op['judge'], {}).update(op['attrs'])
+    elif kind == 'scores':
+        judge_num = op['judge']
+        if op.get('confirm'):
+            room['scores'][judge_num] = dict(op['scores'])
+            room.setdefault('judges', {}).setdefault(judge_num, {})['confirmed'] = True
+        else:
+            room['scores'].setdefault(judge_num, {}).update(op['scores'])
+        completion = room.setdefault('completion', {})
+        was_complete = completion.get(judge_num) == []
+        completion[judge_num] = _ws_missing_fields(room['scoring_type'], room['scores'][judge_num])
+        if was_complete != (not completion[judge_num]):
+            room['complete_judges'] = room.get('complete_judges', 0) + (-1 if was_complete else 1)
+    elif kind == 'clear':
+        room['scores'] = {j: {} for j in range(1, room.get('panel_size', 3) + 1)}
+        room['completion'] = {}
+        room['complete_judges'] = 0
+        for j in op.get('unconfirm', []):
+            if j in room.get('judges', {}):
+                room['judges'][j]['confirmed'] = False
+    if 'seq' in op:
+        room['seq'] = op['seq']
+
+
+def _record_ws_op(op):
+    """Apply a room change in memory and append it to the journal (fallback mode).
+
+    Returns the room's seq afterwards, or None if the room doesn't exist.
+    """
+    global _ws_journal, _ws_journal_ops
+    _apply_ws_op(_ws_rooms_memory, op)
+    try:
+        if _ws_journal is None:
+            _ws_journal = open(WS_ROOMS_JOURNAL, 'a')
+        _ws_journal.write(json.dumps(op, default=str) + '\n')
+        _ws_journal.flush()
+        _ws_journal_ops += 1
+        if _ws_journal_ops >= WS_JOURNAL_COMPACT_OPS:
+            _save_ws_rooms_to_file()
+    except Exception as e:
+        print(f"[WS_ROOMS] Error writing room journal: {e}")
+    room = _ws_rooms_memory.get(op['code'])
+    return room.get('seq', 0) if room is not None else None
 
 
 def _save_ws_rooms_to_file():
-    """Persist in-memory rooms to disk (fallback mode)."""
+    """Write a compacted snapshot of in-memory rooms and start a new journal (fallback mode).
+
+    The snapshot goes to a temp file that is renamed into place, so a crash
+    leaves either the old or the new snapshot, never a partial one.
+    """
+    global _ws_journal, _ws_journal_ops
     try:
         saveable = {}
         for code, room in _ws_rooms_memory.items():
             r = dict(room)
-            r['judges'] = {str(k): {'name': v.get('name', ''), 'connected': False}
+            r['judges'] = {str(k): {'name': v.get('name', ''), 'connected': False,
+                                    'confirmed': v.get('confirmed', False)}
                            for k, v in r.get('judges', {}).items()}
             r.pop('video', None)
             # Convert int keys in scores to strings for JSON
             r['scores'] = {str(k): v for k, v in r.get('scores', {}).items()}
             saveable[code] = r
-        with open(WS_ROOMS_FILE, 'w') as f:
+        tmp_path = WS_ROOMS_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
             json.dump(saveable, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, WS_ROOMS_FILE)
+        # Everything journaled so far is in the snapshot now
+        if _ws_journal is not None:
+            _ws_journal.close()
+        _ws_journal = open(WS_ROOMS_JOURNAL, 'w')
+        _ws_journal_ops = 0
     except Exception as e:
         print(f"[WS_ROOMS] Error saving rooms to file: {e}")
 
 
 def _load_ws_rooms_from_file():
-    """Load rooms from disk (fallback mode)."""
+    """Load rooms from the snapshot and replay the journal on top (fallback mode)."""
+    rooms = {}
     try:
         if os.path.exists(WS_ROOMS_FILE):
             with open(WS_ROOMS_FILE, 'r') as f:
                 rooms = json.load(f)
             for code, room in rooms.items():
-                room['scores'] = {int(k): v for k, v in room.get('scores', {}).items()}
-                room['judges'] = {int(k): v for k, v in room.get('judges', {}).items()}
-            return rooms
+                _ws_room_from_json(room)
     except Exception as e:
         print(f"[WS_ROOMS] Error loading rooms from file: {e}")
-    return {}
+    replayed = 0
+    try:
+        if os.path.exists(WS_ROOMS_JOURNAL):
+            with open(WS_ROOMS_JOURNAL, 'r') as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash mid-append
+                    if op.get('op') == 'set':
+                        _ws_room_from_json(op['room'])
+                    _apply_ws_op(rooms, op)
+                    replayed += 1
+        if replayed:
+            print(f"[WS_ROOMS] Replayed {replayed} journaled room changes")
+    except Exception as e:
+        print(f"[WS_ROOMS] Error replaying room journal: {e}")
+    return rooms
 
 
 def _get_ws_room(code):
     """Get a room by code. Redis-backed with in-memory fallback."""
     if REDIS_AVAILABLE and redis_client:
         try:
-            data = redis_client.get(f'ws_room:{code}')
-            if data:
-                room = json.loads(data)
-                room['scores'] = {int(k): v for k, v in room.get('scores', {}).items()}
-                room['judges'] = {int(k): v for k, v in room.get('judges', {}).items()}
+            pipe = redis_client.pipeline()  # MULTI, so seq matches the contents
+            for key in _ws_room_keys(code):
+                pipe.hgetall(key)
+            meta, judges, scores, completion = pipe.execute()
+            if meta:
+                room = _decode_ws_room(meta, judges, scores, completion)
+                _apply_ws_presence({code: room})
                 return room
             return None
         except Exception as e:
             print(f"[REDIS] Error getting room {code}: {e}")
-    return _ws_rooms_memory.get(code)
+    room = _ws_local_store.get(code) if _ws_local_store else _ws_rooms_memory.get(code)
+    if room is not None:
+        _apply_ws_presence({code: room})
+    return room
+
+
+def _create_ws_room(code, room):
+    """Save a new room unless one with this code already exists. Returns True if created."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            with redis_client.pipeline() as pipe:
+                pipe.watch(_ws_room_keys(code)[0])
+                if pipe.exists(_ws_room_keys(code)[0]):
+                    return False
+                pipe.multi()
+                _write_ws_room(pipe, code, room)
+                pipe.execute()
+                return True
+        except redis_lib.WatchError:
+            return False  # another worker created it first
+        except Exception as e:
+            print(f"[REDIS] Error creating room {code}: {e}")
+    if _ws_local_store:
+        return _ws_local_store.create(code, room)
+    if code in _ws_rooms_memory:
+        return False
+    _record_ws_op({'op': 'set', 'code': code, 'room': room})
+    return True
 
 
 def _set_ws_room(code, room):
-    """Save a room. Redis-backed with in-memory fallback."""
+    """Save a whole room (create, reset, type change). Redis-backed with in-memory fallback."""
     if REDIS_AVAILABLE and redis_client:
         try:
-            saveable = dict(room)
-            saveable['judges'] = {str(k): v for k, v in saveable.get('judges', {}).items()}
-            saveable['scores'] = {str(k): v for k, v in saveable.get('scores', {}).items()}
-            saveable.pop('video', None)
-            redis_client.set(f'ws_room:{code}', json.dumps(saveable))
+            pipe = redis_client.pipeline()
+            _write_ws_room(pipe, code, room)
+            pipe.execute()
             return
         except Exception as e:
             print(f"[REDIS] Error saving room {code}: {e}")
-    _ws_rooms_memory[code] = room
-    _save_ws_rooms_to_file()
+    if _ws_local_store:
+        _ws_local_store.apply({'op': 'set', 'code': code, 'room': room})
+        return
+    _record_ws_op({'op': 'set', 'code': code, 'room': room})
+
+
+def _update_ws_room(code, **fields):
+    """Set room settings fields in place; a value of None removes the field.
+
+    Returns the room's new seq.
+    """
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            room_key = _ws_room_keys(code)[0]
+            pipe = redis_client.pipeline()
+            for field, value in fields.items():
+                if field == 'video':
+                    continue  # derived from video_url on read
+                if value is None:
+                    pipe.hdel(room_key, field)
+                else:
+                    pipe.hset(room_key, field, json.dumps(value))
+            pipe.hincrby(room_key, 'seq', 1)
+            return pipe.execute()[-1]
+        except Exception as e:
+            print(f"[REDIS] Error updating room {code}: {e}")
+    if _ws_local_store:
+        room = _ws_local_store.apply({'op': 'room', 'code': code, 'fields': fields})
+        return room['seq'] if room else None
+    room = _ws_rooms_memory.get(code)
+    if room is None:
+        return None
+    return _record_ws_op({'op': 'room', 'code': code, 'fields': fields, 'seq': room.get('seq', 0) + 1})
+
+
+def _update_ws_judge(code, judge_num, **attrs):
+    """Set attributes (name, sid, confirmed) of one judge in place.
+
+    Returns the room's new seq.
+    """
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            room_key, judges_key = _ws_room_keys(code)[:2]
+            pipe = redis_client.pipeline()
+            pipe.hset(judges_key, mapping={
+                f'{judge_num}:{attr}': json.dumps(value) for attr, value in attrs.items()})
+            pipe.hincrby(room_key, 'seq', 1)
+            return pipe.execute()[-1]
+        except Exception as e:
+            print(f"[REDIS] Error updating judge {judge_num} in room {code}: {e}")
+    if _ws_local_store:
+        room = _ws_local_store.apply({'op': 'judge', 'code': code, 'judge': judge_num, 'attrs': attrs})
+        return room['seq'] if room else None
+    room = _ws_rooms_memory.get(code)
+    if room is None:
+        return None
+    return _record_ws_op({'op': 'judge', 'code': code, 'judge': judge_num, 'attrs': attrs,
+                          'seq': room.get('seq', 0) + 1})
+
+
+def _update_ws_scores(code, judge_num, scores, confirm=False):
+    """Atomically write score fields for one judge.
+
+    Plain updates are refused once the room is locked; `confirm` replaces
+    the judge's scores, marks them confirmed and is only allowed while
+    scoring. Returns None if the room is gone, False if its state refused
+    the write, otherwise (new seq, fields the judge is still missing,
+    number of complete judges in the room).
+    """
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            room_key = _ws_room_keys(code)[0]
+            scoring_type = json.loads(redis_client.hget(room_key, 'scoring_type') or 'null')
+            required = WS_SCORE_FIELDS.get(scoring_type, {})
+            args = ['scoring' if confirm else 'open', judge_num, '1' if confirm else '0', len(required)]
+            for field, (min_val, max_val) in required.items():
+                args += [field, min_val, max_val]
+            for field, value in scores.items():
+                args += [field, json.dumps(value)]
+            result = _ws_score_script(keys=list(_ws_room_keys(code)), args=args)
+            if not isinstance(result, list):
+                return None if result < 0 else False
+            seq, missing, complete_judges = result
+            return seq, json.loads(missing), complete_judges
+        except Exception as e:
+            print(f"[REDIS] Error saving scores in room {code}: {e}")
+
+    def writable(room):
+        return not (room['state'] == 'complete' or (confirm and room['state'] != 'scoring'))
+
+    op = {'op': 'scores', 'code': code, 'judge': judge_num, 'scores': scores, 'confirm': confirm}
+    if _ws_local_store:
+        room = _ws_local_store.apply(op, check=writable)
+        if not room:
+            return room
+        return room['seq'], list(room['completion'][judge_num]), room['complete_judges']
+    room = _ws_rooms_memory.get(code)
+    if room is None:
+        return None
+    if not writable(room):
+        return False
+    seq = _record_ws_op(dict(op, seq=room.get('seq', 0) + 1))
+    return seq, list(room['completion'][judge_num]), room['complete_judges']
+
+
+def _clear_ws_scores(code, unconfirm_judges=(), **fields):
+    """Atomically clear all scores, un-confirm the given judges and set room fields.
+
+    Returns the room's new seq.
+    """
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            room_key, judges_key, scores_key, completion_key = _ws_room_keys(code)
+            pipe = redis_client.pipeline()
+            pipe.delete(scores_key, completion_key)
+            pipe.hset(room_key, 'complete_judges', 0)
+            for j in unconfirm_judges:
+                pipe.hset(judges_key, f'{j}:confirmed', 'false')
+            for field, value in fields.items():
+                if field == 'video':
+                    continue
+                if value is None:
+                    pipe.hdel(room_key, field)
+                else:
+                    pipe.hset(room_key, field, json.dumps(value))
+            pipe.hincrby(room_key, 'seq', 1)
+            return pipe.execute()[-1]
+        except Exception as e:
+            print(f"[REDIS] Error clearing scores in room {code}: {e}")
+    if _ws_local_store:
+        room = _ws_local_store.apply({'op': 'clear', 'code': code, 'fields': fields,
+                                      'unconfirm': list(unconfirm_judges)})
+        return room['seq'] if room else None
+    room = _ws_rooms_memory.get(code)
+    if room is None:
+        return None
+    return _record_ws_op({'op': 'clear', 'code': code, 'fields': fields, 'unconfirm': list(unconfirm_judges),
+                          'seq': room.get('seq', 0) + 1})
+
+
+def _claim_ws_round(code, seq, **fields):
+    """Atomically mark a room as finalizing, if it is unchanged since `seq`.
+
+    Only one finalize of a round gets past this, however many event judge
+    clicks or sockets race for it. Sets the given room fields too. Returns
+    the new seq, or None if the room changed or is already being finalized.
+    """
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            args = [seq]
+            for field, value in fields.items():
+                args += [field, json.dumps(value)]
+            return _ws_claim_script(keys=[_ws_room_keys(code)[0]], args=args) or None
+        except Exception as e:
+            print(f"[REDIS] Error claiming round in room {code}: {e}")
+            return None
+
+    def claimable(room):
+        return room['state'] in ('scoring', 'complete') and room.get('seq', 0) == seq
+
+    op = {'op': 'room', 'code': code, 'fields': dict(fields, state='finalizing')}
+    if _ws_local_store:
+        room = _ws_local_store.apply(op, check=claimable)
+        return room['seq'] if room else None
+    room = _ws_rooms_memory.get(code)
+    if room is None or not claimable(room):
+        return None
+    return _record_ws_op(dict(op, seq=seq + 1))
+
+
+def _index_ws_sid(sid, code, judge_num):
+    """Remember which room seat a socket holds, so disconnects need no room scan."""
+    _ws_sid_index[sid] = (code, judge_num)
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            redis_client.set(f'ws_sid:{sid}', json.dumps([code, judge_num]), ex=WS_SID_TTL)
+        except Exception as e:
+            print(f"[REDIS] Error indexing sid {sid}: {e}")
+
+
+def _pop_ws_sid(sid):
+    """Forget a socket's seat and return it as (room_code, judge_num), or None."""
+    entry = _ws_sid_index.pop(sid, None)
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            pipe = redis_client.pipeline()
+            pipe.get(f'ws_sid:{sid}')
+            pipe.delete(f'ws_sid:{sid}')
+            data, _ = pipe.execute()
+            if entry is None and data:
+                entry = tuple(json.loads(data))
+        except Exception as e:
+            print(f"[REDIS] Error removing sid {sid}: {e}")
+    return entry
+
+
+def _ws_presence_key(code, judge_num):
+    return f'ws_presence:{code}:{judge_num}'
+
+
+def _apply_ws_presence(rooms):
+    """Set each judge's `connected` flag from the presence keys, in one round trip."""
+    seats = [(code, j) for code, room in rooms.items() for j in room.get('judges', {})]
+    if not seats:
+        return
+    present = set()
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            values = redis_client.mget([_ws_presence_key(code, j) for code, j in seats])
+            present = {seat for seat, value in zip(seats, values) if value}
+        except Exception as e:
+            print(f"[REDIS] Error reading presence: {e}")
+    elif _ws_local_store:
+        present = _ws_local_store.present(seats)
+    else:
+        now = time.monotonic()
+        present = {seat for seat in seats if _ws_presence.get(seat, (None, 0))[1] > now}
+    for code, j in seats:
+        rooms[code]['judges'][j]['connected'] = (code, j) in present
+
+
+def _set_ws_presence(code, judge_num, sid):
+    """Mark a judge present on this socket (on join)."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            redis_client.set(_ws_presence_key(code, judge_num), sid, ex=WS_PRESENCE_TTL)
+            return
+        except Exception as e:
+            print(f"[REDIS] Error setting presence in room {code}: {e}")
+    if _ws_local_store:
+        _ws_local_store.set_presence(code, judge_num, sid, WS_PRESENCE_TTL)
+        return
+    _ws_presence[(code, judge_num)] = (sid, time.monotonic() + WS_PRESENCE_TTL)
+
+
+def _refresh_ws_presence(code, judge_num, sid):
+    """Extend a judge's presence on a heartbeat.
+
+    Returns 0 if the seat belongs to another socket, 1 if refreshed, 2 if
+    the judge had timed out and is back.
+    """
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            return _ws_presence_script(keys=[_ws_presence_key(code, judge_num), _ws_room_keys(code)[1]],
+                                       args=[sid, WS_PRESENCE_TTL, judge_num, json.dumps(sid)])
+        except Exception as e:
+            print(f"[REDIS] Error refreshing presence in room {code}: {e}")
+            return 0
+    if _ws_local_store:
+        return _ws_local_store.refresh_presence(code, judge_num, sid, WS_PRESENCE_TTL)
+    judge = _ws_rooms_memory.get(code, {}).get('judges', {}).get(judge_num)
+    if not judge or judge.get('sid') != sid:
+        return 0
+    now = time.monotonic()
+    present = _ws_presence.get((code, judge_num), (None, 0))[1] > now
+    _ws_presence[(code, judge_num)] = (sid, now + WS_PRESENCE_TTL)
+    return 1 if present else 2
+
+
+def _clear_ws_presence(code, judge_num, sid):
+    """Mark a judge absent if this socket still holds the seat. Returns True if it did."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            return bool(_ws_absence_script(keys=[_ws_presence_key(code, judge_num)], args=[sid]))
+        except Exception as e:
+            print(f"[REDIS] Error clearing presence in room {code}: {e}")
+            return False
+    if _ws_local_store:
+        return _ws_local_store.clear_presence(code, judge_num, sid)
+    entry = _ws_presence.get((code, judge_num))
+    if not entry or entry[0] != sid:
+        return False
+    del _ws_presence[(code, judge_num)]
+    return entry[1] > time.monotonic()
 
 
 def _del_ws_room(code):
     """Delete a room."""
     if REDIS_AVAILABLE and redis_client:
         try:
-            redis_client.delete(f'ws_room:{code}')
+            pipe = redis_client.pipeline()
+            pipe.delete(*_ws_room_keys(code))
+            pipe.srem(WS_ROOMS_KEY, code)
+            pipe.execute()
             return
         except Exception as e:
             print(f"[REDIS] Error deleting room {code}: {e}")
-    _ws_rooms_memory.pop(code, None)
-    _save_ws_rooms_to_file()
+    if _ws_local_store:
+        _ws_local_store.apply({'op': 'del', 'code': code})
+        return
+    _record_ws_op({'op': 'del', 'code': code})
 
 
 def _get_all_ws_rooms():
     """Get all rooms as a dict."""
     if REDIS_AVAILABLE and redis_client:
         try:
+            codes = sorted(redis_client.smembers(WS_ROOMS_KEY))
+            pipe = redis_client.pipeline(transaction=False)
+            for code in codes:
+                for key in _ws_room_keys(code):
+                    pipe.hgetall(key)
+            values = pipe.execute()
             rooms = {}
-            cursor = 0
-            while True:
-                cursor, keys = redis_client.scan(cursor, match='ws_room:*', count=100)
-                if keys:
-                    pipe = redis_client.pipeline()
-                    for key in keys:
-                        pipe.get(key)
-                    values = pipe.execute()
-                    for key, val in zip(keys, values):
-                        if val:
-                            code = key.replace('ws_room:', '', 1)
-                            room = json.loads(val)
-                            room['scores'] = {int(k): v for k, v in room.get('scores', {}).items()}
-                            room['judges'] = {int(k): v for k, v in room.get('judges', {}).items()}
-                            rooms[code] = room
-                if cursor == 0:
-                    break
+            for i, code in enumerate(codes):
+                meta, judges, scores, completion = values[4 * i:4 * i + 4]
+                if meta:
+                    rooms[code] = _decode_ws_room(meta, judges, scores, completion)
+            _apply_ws_presence(rooms)
             return rooms
         except Exception as e:
             print(f"[REDIS] Error getting all rooms: {e}")
-    return dict(_ws_rooms_memory)
+    rooms = _ws_local_store.all() if _ws_local_store else dict(_ws_rooms_memory)
+    _apply_ws_presence(rooms)
+    return rooms
 
 
 def _ws_room_exists(code):
     """Check if a room exists."""
     if REDIS_AVAILABLE and redis_client:
         try:
-            return redis_client.exists(f'ws_room:{code}') > 0
+            return redis_client.exists(_ws_room_keys(code)[0]) > 0
         except Exception as e:
             print(f"[REDIS] Error checking room {code}: {e}")
+    if _ws_local_store:
+        return _ws_local_store.exists(code)
     return code in _ws_rooms_memory
 
 
+def _ws_standings_key(code, round_num=0):
+    """Redis sorted set of cumulative standings (round 0) or of one round's totals."""
+    return f'ws_standings:{code}' if not round_num else f'ws_standings:{code}:r{round_num}'
+
+
+def _ws_memory_standings(code):
+    return _ws_standings.setdefault(code, {'totals': {}, 'rounds': {}, 'order': {}})
+
+
+def _ws_memory_rank(standings, round_num, competitor, old, new):
+    """Move a competitor within one sorted (-total, competitor) list."""
+    order = standings['order'].setdefault(round_num, [])
+    if old is not None:
+        del order[bisect.bisect_left(order, (-old, competitor))]
+    bisect.insort(order, (-new, competitor))
+
+
+def _add_ws_standing(code, competitor, total):
+    """Add a finalized round's total to a competitor's standing. Returns their round number."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            key = _ws_standings_key(code)
+            pipe = redis_client.pipeline()
+            pipe.zincrby(key, total, competitor)
+            pipe.hincrby(f'{key}:rounds', competitor, 1)
+            round_num = pipe.execute()[-1]
+            redis_client.zadd(_ws_standings_key(code, round_num), {competitor: total})
+            return round_num
+        except Exception as e:
+            print(f"[REDIS] Error adding standing in room {code}: {e}")
+    if _ws_local_store:
+        return _ws_local_store.add_standing(code, competitor, total)
+    standings = _ws_memory_standings(code)
+    old = standings['totals'].get(competitor)
+    standings['totals'][competitor] = (old or 0) + total
+    round_num = standings['rounds'][competitor] = standings['rounds'].get(competitor, 0) + 1
+    _ws_memory_rank(standings, 0, competitor, old, standings['totals'][competitor])
+    _ws_memory_rank(standings, round_num, competitor, None, total)
+    return round_num
+
+
+def _get_ws_standings(code, limit, round_num=0):
+    """Top `limit` competitors, best first, cumulative (round 0) or for one round.
+
+    Returns [{'rank', 'competitor', 'total', 'rounds'}]; `rounds` is how
+    many rounds the cumulative total covers (1 for a single round).
+    """
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            entries = redis_client.zrevrange(_ws_standings_key(code, round_num), 0, limit - 1, withscores=True)
+            rounds = [1] * len(entries)
+            if entries and not round_num:
+                rounds = redis_client.hmget(f'{_ws_standings_key(code)}:rounds', [name for name, _ in entries])
+            return [{'rank': i + 1, 'competitor': name, 'total': round(total, 4), 'rounds': int(n or 0)}
+                    for i, ((name, total), n) in enumerate(zip(entries, rounds))]
+        except Exception as e:
+            print(f"[REDIS] Error reading standings in room {code}: {e}")
+    if _ws_local_store:
+        entries = _ws_local_store.standings(code, limit, round_num)
+    else:
+        standings = _ws_standings.get(code, {'order': {}, 'rounds': {}})
+        entries = [(name, -neg_total, standings['rounds'][name] if not round_num else 1)
+                   for neg_total, name in standings['order'].get(round_num, [])[:limit]]
+    return [{'rank': i + 1, 'competitor': name, 'total': round(total, 4), 'rounds': n}
+            for i, (name, total, n) in enumerate(entries)]
+
+
+def _ws_projected_rank(code, competitor, round_total):
+    """Cumulative rank a competitor would have if this round counted `round_total`."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            key = _ws_standings_key(code)
+            projected = (redis_client.zscore(key, competitor) or 0) + round_total
+            return redis_client.zcount(key, f'({projected}', '+inf') + 1
+        except Exception as e:
+            print(f"[REDIS] Error ranking {competitor} in room {code}: {e}")
+    if _ws_local_store:
+        return _ws_local_store.projected_rank(code, competitor, round_total)
+    standings = _ws_standings.get(code, {'totals': {}, 'order': {}})
+    projected = standings['totals'].get(competitor, 0) + round_total
+    return bisect.bisect_left(standings['order'].get(0, []), (-projected, '')) + 1
+
+
+def _reset_ws_standings(code):
+    """Clear a room's standings, e.g. before a new event."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            key = _ws_standings_key(code)
+            rounds = [int(n) for n in redis_client.hvals(f'{key}:rounds')]
+            redis_client.delete(key, f'{key}:rounds',
+                                *[_ws_standings_key(code, n) for n in range(1, max(rounds, default=0) + 1)])
+            return
+        except Exception as e:
+            print(f"[REDIS] Error resetting standings in room {code}: {e}")
+    if _ws_local_store:
+        _ws_local_store.reset_standings(code)
+        return
+    _ws_standings.pop(code, None)
+
+
+def _ws_marks_key(code, judge_num):
+    return f'ws_marks:{code}:{judge_num}'
+
+
+def _update_ws_marks(code, judge_num, add, remove):
+    """Add and remove one judge's marks atomically. Returns their sorted marks afterwards."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            key = _ws_marks_key(code, judge_num)
+            pipe = redis_client.pipeline()
+            if remove:
+                pipe.zrem(key, *remove)
+            if add:
+                pipe.zadd(key, {str(mark): mark for mark in add})
+            pipe.zremrangebyrank(key, MAX_MARKS_PER_JUDGE, -1)
+            pipe.expire(key, WS_MARKS_TTL)
+            pipe.zrange(key, 0, -1)
+            return [int(mark) for mark in pipe.execute()[-1]]
+        except Exception as e:
+            print(f"[REDIS] Error saving marks in room {code}: {e}")
+    if _ws_local_store:
+        return _ws_local_store.update_marks(code, judge_num, add, remove, MAX_MARKS_PER_JUDGE)
+    judges = _ws_marks.setdefault(code, {})
+    judges[judge_num] = merge_marks(judges.get(judge_num, []), add, remove)[:MAX_MARKS_PER_JUDGE]
+    return judges[judge_num]
+
+
+def _get_ws_marks(code, panel_size):
+    """Every judge's sorted marks as {judge_num: marks}; judges without marks are left out."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for j in range(1, panel_size + 1):
+                pipe.zrange(_ws_marks_key(code, j), 0, -1)
+            return {j: [int(mark) for mark in marks]
+                    for j, marks in enumerate(pipe.execute(), 1) if marks}
+        except Exception as e:
+            print(f"[REDIS] Error reading marks in room {code}: {e}")
+    if _ws_local_store:
+        return _ws_local_store.marks(code)
+    return {j: marks for j, marks in _ws_marks.get(code, {}).items() if marks}
+
+
+def _clear_ws_marks(code, panel_size):
+    """Drop every judge's marks (finalize, reset, type change)."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            redis_client.delete(*[_ws_marks_key(code, j) for j in range(1, panel_size + 1)])
+            return
+        except Exception as e:
+            print(f"[REDIS] Error clearing marks in room {code}: {e}")
+    if _ws_local_store:
+        _ws_local_store.clear_marks(code)
+        return
+    _ws_marks.pop(code, None)
+
+
 # --- Initialize rooms ---
 
 # Load from file into memory (fallback data source)
 _ws_rooms_memory = _load_ws_rooms_from_file()
 
+if not REDIS_AVAILABLE and WS_LOCAL_STORE:
+    try:
+        _ws_local_store = LocalRoomStore(WS_LOCAL_STORE, _apply_ws_op, _ws_room_from_json)
+        print(f"[WS_ROOMS] Using shared local room store {WS_LOCAL_STORE}")
+    except Exception as e:
+        print(f"[WS_ROOMS] Local room store unavailable ({e}), keeping rooms per process")
+
+# One-time migration from the JSON file to the local store (first worker wins)
+if _ws_local_store and _ws_rooms_memory:
+    try:
+        if _ws_local_store.import_rooms(_ws_rooms_memory):
+            for path in (WS_ROOMS_FILE, WS_ROOMS_JOURNAL):
+                if os.path.exists(path):
+                    os.rename(path, path + '.migrated')
+            print(f"[WS_ROOMS] Migrated {len(_ws_rooms_memory)} rooms to the local store")
+    except Exception as e:
+        print(f"[WS_ROOMS] Local store migration error: {e}")
+
+if (not REDIS_AVAILABLE and not _ws_local_store
+        and os.path.exists(WS_ROOMS_JOURNAL) and os.path.getsize(WS_ROOMS_JOURNAL)):
+    _save_ws_rooms_to_file()  # start from a compacted snapshot
+
 # One-time migration from JSON file to Redis
 if REDIS_AVAILABLE and redis_client:
     try:
-        existing_keys = redis_client.keys('ws_room:*')
-        if not existing_keys and _ws_rooms_memory:
+        if not redis_client.exists(WS_ROOMS_KEY) and not redis_client.keys('ws_room:*') and _ws_rooms_memory:
             print(f"[REDIS] Migrating {len(_ws_rooms_memory)} rooms from JSON to Redis...")
             for code, room in _ws_rooms_memory.items():
                 _set_ws_room(code, room)
-            migrated_path = WS_ROOMS_FILE + '.migrated'
-            if os.path.exists(WS_ROOMS_FILE):
-                os.rename(WS_ROOMS_FILE, migrated_path)
+            for path in (WS_ROOMS_FILE, WS_ROOMS_JOURNAL):
+                if os.path.exists(path):
+                    os.rename(path, path + '.migrated')
             print("[REDIS] Migration complete")
     except Exception as e:
         print(f"[REDIS] Migration error: {e}")
 
+# One-time conversion of rooms stored as JSON strings to hashes
+if REDIS_AVAILABLE and redis_client:
+    try:
+        converted = 0
+        for key in redis_client.scan_iter(match='ws_room:*', count=100):
+            if key.count(':') != 1 or redis_client.type(key) != 'string':
+                continue
+            data = redis_client.get(key)
+            if not data:
+                continue
+            room = json.loads(data)
+            room['scores'] = {int(k): v for k, v in room.get('scores', {}).items()}
+            room['judges'] = {int(k): v for k, v in room.get('judges', {}).items()}
+            _set_ws_room(key.split(':', 1)[1], room)
+            converted += 1
+        if converted:
+            print(f"[REDIS] Converted {converted} rooms to hash storage")
+    except Exception as e:
+        print(f"[REDIS] Room conversion error: {e}")
+
 
 def generate_room_code():
     """Generate a 6-character alphanumeric room code."""
@@ -2174,7 +4353,12 @@ def generate_room_code():
 
 
 def _ensure_permanent_rooms():
-    """Ensure all permanent rooms exist. Create missing ones, don't overwrite existing."""
+    """Ensure all permanent rooms exist. Create missing ones, don't overwrite existing.
+
+    Safe to run from every worker at once: creation only happens if the
+    room is still absent, and existing rooms are only touched when their
+    definition changed.
+    """
     for code, definition in PERMANENT_ROOMS.items():
         room = _get_ws_room(code)
         if room is None:
@@ -2189,56 +4373,133 @@ def _ensure_permanent_rooms():
                 'allowed_types': definition.get('allowed_types'),
                 'created_at': datetime.now().isoformat(),
             }
-            _set_ws_room(code, new_room)
+            _create_ws_room(code, new_room)
         else:
-            changed = False
+            changes = {}
             if not room.get('permanent'):
-                room['permanent'] = True
-                changed = True
+                changes['permanent'] = True
             if 'allowed_types' not in room and definition.get('allowed_types'):
-                room['allowed_types'] = definition['allowed_types']
-                changed = True
-            if changed:
-                _set_ws_room(code, room)
+                changes['allowed_types'] = definition['allowed_types']
+            if changes:
+                _update_ws_room(code, **changes)
 
 
 _ensure_permanent_rooms()
 
 
-def _reset_all_connected_flags():
-    """On startup, mark all judges as disconnected (no sockets survive a restart)."""
-    all_rooms = _get_all_ws_rooms()
-    for code, room in all_rooms.items():
-        changed = False
-        for judge_num, judge in room.get('judges', {}).items():
-            if judge.get('connected'):
-                judge['connected'] = False
-                changed = True
-        if changed:
+def _backfill_ws_completion():
+    """Store completion for rooms saved before it was tracked incrementally."""
+    for code, room in _get_all_ws_rooms().items():
+        if 'complete_judges' not in room:
             _set_ws_room(code, room)
 
 
-_reset_all_connected_flags()
+_backfill_ws_completion()
 
 
 # --- Helper ---
 
+def _ws_judge_completion(room, j):
+    """One judge's completion status, as stored with the room."""
+    missing = room.get('completion', {}).get(j)
+    if missing is None:
+        missing = list(WS_SCORE_FIELDS.get(room['scoring_type'], {}))
+    return {'complete': len(missing) == 0, 'missing': missing}
+
+
 def _ws_scoring_completion(room):
-    """Compute per-judge completion status."""
-    required_fields = WS_SCORE_FIELDS.get(room['scoring_type'], {})
+    """Per-judge completion status, as stored with the room."""
     panel_size = room.get('panel_size', 3)
-    completion = {}
-    for j in range(1, panel_size + 1):
-        judge_scores = room.get('scores', {}).get(j, {})
-        missing = []
-        for field, (min_val, max_val) in required_fields.items():
-            v = judge_scores.get(field)
-            if v is None:
-                missing.append(field)
-            elif v < min_val or v > max_val:
-                missing.append(field)
-        completion[j] = {'complete': len(missing) == 0, 'missing': missing}
-    return completion
+    return {j: _ws_judge_completion(room, j) for j in range(1, panel_size + 1)}
+
+
+def _ws_confirmed_scores(room):
+    """Scores of the judges who have confirmed, the ones a round result counts."""
+    return {j: room.get('scores', {}).get(j, {})
+            for j, judge in room.get('judges', {}).items() if judge.get('confirmed')}
+
+
+def _ws_judge_info(judge):
+    """Public view of a judge (no sid)."""
+    return {'name': judge.get('name', ''), 'connected': judge.get('connected', False),
+            'confirmed': judge.get('confirmed', False)}
+
+
+def _ws_room_snapshot(room_code, room):
+    """Full room state for a (re)joining client; deltas with a higher seq apply on top."""
+    snapshot = {
+        'seq': room.get('seq', 0),
+        'judges': {str(k): _ws_judge_info(v) for k, v in room.get('judges', {}).items()},
+        'state': room['state'],
+        'scores': {str(k): v for k, v in room.get('scores', {}).items()},
+        'scoring_type': room['scoring_type'],
+        'panel_size': room.get('panel_size', 3),
+        'completion': _ws_scoring_completion(room),
+        'complete_judges': room.get('complete_judges', 0),
+        'competitor': room.get('competitor'),
+    }
+    if room['scoring_type'] in MARK_SCORING_TYPES:
+        snapshot['marks'] = {str(j): encode_marks(marks)
+                             for j, marks in _get_ws_marks(room_code, room.get('panel_size', 3)).items()}
+    return snapshot
+
+
+def _ws_scoreboard(room_code, room):
+    """Read-only room view for spectators: no sids, no per-field completion."""
+    completion = _ws_scoring_completion(room)
+    return {
+        'room_code': room_code,
+        'seq': room.get('seq', 0),
+        'state': room['state'],
+        'scoring_type': room['scoring_type'],
+        'panel_size': room.get('panel_size', 3),
+        'judges': {str(k): _ws_judge_info(v) for k, v in room.get('judges', {}).items()},
+        'scores': {str(k): v for k, v in room.get('scores', {}).items()},
+        'complete': {str(j): status['complete'] for j, status in completion.items()},
+        'complete_judges': room.get('complete_judges', 0),
+        'competitor': room.get('competitor'),
+        'last_result': room.get('last_result'),
+        'standings': _get_ws_standings(room_code, STANDINGS_BROADCAST_TOP),
+    }
+
+
+def _mark_ws_spectators(room_code):
+    """Note that a room changed; its spectators get it on the next tick."""
+    global _ws_spectator_task
+    _ws_spectator_dirty.add(room_code)
+    if _ws_spectator_task is None and SOCKETIO_ENABLED and socketio:
+        _ws_spectator_task = socketio.start_background_task(_ws_spectator_loop)
+
+
+def _claim_ws_spectator_tick(room_code):
+    """Claim this tick's push for a room, so processes together respect SPECTATOR_MAX_HZ."""
+    if REDIS_AVAILABLE and redis_client:
+        try:
+            return bool(redis_client.set(f'ws_spectate_tick:{room_code}', 1, nx=True,
+                                         px=max(int(1000 / SPECTATOR_MAX_HZ), 1)))
+        except Exception as e:
+            print(f"[REDIS] Error claiming spectator tick for {room_code}: {e}")
+    return True
+
+
+def _ws_spectator_loop():
+    """Push one coalesced scoreboard per changed room per tick."""
+    while True:
+        socketio.sleep(1 / SPECTATOR_MAX_HZ)
+        dirty = list(_ws_spectator_dirty)
+        _ws_spectator_dirty.difference_update(dirty)
+        for room_code in dirty:
+            try:
+                if not _claim_ws_spectator_tick(room_code):
+                    _ws_spectator_dirty.add(room_code)  # another process just pushed; next tick
+                    continue
+                room = _get_ws_room(room_code)
+                if room:
+                    socketio.emit('ws_scoring_scoreboard',
+                                  json.dumps(_ws_scoreboard(room_code, room), separators=(',', ':')),
+                                  room=f'spectate:{room_code}')
+            except Exception as e:
+                print(f"[SPECTATE] Error pushing scoreboard for {room_code}: {e}")
 
 
 def _resolve_video_url(url):
@@ -2262,6 +4523,347 @@ def _resolve_video_url(url):
     return {'video_src': url, 'is_direct_url': True}
 
 
+# --- Round history (write-behind to Postgres) ---
+#
+# Finalized rounds are queued in memory and written by a background thread,
+# so the finalize handler never waits on the database. A failed write is
+# retried until it succeeds; the queue is drained on shutdown.
+
+ROUND_HISTORY_QUEUE_MAX = int(os.environ.get('ROUND_HISTORY_QUEUE_MAX', 10000))
+ROUND_HISTORY_BATCH = 100
+ROUND_HISTORY_CSV_FIELDS = sorted({field for fields in WS_SCORE_FIELDS.values() for field in fields})
+_round_queue = queue.Queue(maxsize=ROUND_HISTORY_QUEUE_MAX)
+_round_writer = None
+_round_writer_lock = threading.Lock()
+# Rounds the writer has taken off the queue but not yet saved
+_round_pending = []
+# Page cursors carry finalized_at as integer microseconds since the epoch, so
+# they need no URL encoding (an ISO offset's '+' would turn into a space)
+_CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _insert_scoring_rounds(conn, rounds):
+    """Insert queued rounds; already-written rounds are skipped on retry."""
+    cursor = conn.cursor()
+    psycopg2.extras.execute_values(cursor, '''
+        INSERT INTO scoring_rounds
+        (round_id, room_code, scoring_type, event_judge_name, judges, scores, video_url, finalized_at)
+        VALUES %s
+        ON CONFLICT (round_id) DO NOTHING
+    ''', [(r['round_id'], r['room_code'], r['scoring_type'], r['event_judge_name'],
+           json.dumps(r['judges']), json.dumps(r['scores']), r['video_url'], r['finalized_at'])
+          for r in rounds])
+    conn.commit()
+
+
+def _save_scoring_rounds(conn, rounds):
+    """Write rounds; if the database rejects the batch, write them one at a time.
+
+    A round the database refuses on its own is logged and dropped, so one
+    bad row can't block the rounds behind it. Connection errors propagate
+    so the caller keeps everything and retries.
+    """
+    try:
+        _insert_scoring_rounds(conn, rounds)
+        return
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        raise
+    except Exception as e:
+        conn.rollback()
+        print(f"[ROUNDS] Batch of {len(rounds)} rounds rejected ({e}), saving one at a time")
+    for r in rounds:
+        try:
+            _insert_scoring_rounds(conn, [r])
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            raise
+        except Exception as e:
+            conn.rollback()
+            print(f"[ROUNDS] Dropping round {r['round_id']} in room {r['room_code']}: {e}")
+
+
+def _round_history_writer():
+    """Background thread: write queued rounds in batches, retrying with backoff."""
+    delay = 1
+    while True:
+        if not _round_pending:
+            _round_pending.append(_round_queue.get())
+        while len(_round_pending) < ROUND_HISTORY_BATCH:
+            try:
+                _round_pending.append(_round_queue.get_nowait())
+            except queue.Empty:
+                break
+        batch = list(_round_pending)
+        conn = None
+        try:
+            conn = db_pool.getconn()
+            _save_scoring_rounds(conn, batch)
+            del _round_pending[:len(batch)]
+            delay = 1
+        except Exception as e:
+            print(f"[ROUNDS] Error saving {len(batch)} rounds ({e}), retrying in {delay}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+        finally:
+            if conn is not None:
+                db_pool.putconn(conn)
+
+
+def _flush_round_history():
+    """Write whatever the writer hasn't saved yet, in flight or still queued (at shutdown).
+
+    A batch the writer was in the middle of inserting may be written
+    twice; ON CONFLICT skips the second copy.
+    """
+    rounds = list(_round_pending)
+    while True:
+        try:
+            rounds.append(_round_queue.get_nowait())
+        except queue.Empty:
+            break
+    if not rounds:
+        return
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            _save_scoring_rounds(conn, rounds)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[ROUNDS] Lost {len(rounds)} unsaved rounds at shutdown: {e}")
+
+
+atexit.register(_flush_round_history)
+
+
+def queue_scoring_round(round_id, room_code, room, judges, scores):
+    """Queue a finalized round for saving under the round_id its finalize claimed."""
+    global _round_writer
+    if not DATABASE_URL:
+        return
+    with _round_writer_lock:
+        if _round_writer is None:
+            _round_writer = threading.Thread(target=_round_history_writer, name='round-history', daemon=True)
+            _round_writer.start()
+    try:
+        _round_queue.put_nowait({
+            'round_id': round_id,
+            'room_code': room_code,
+            'scoring_type': room['scoring_type'],
+            'event_judge_name': room.get('event_judge_name'),
+            'judges': judges,
+            'scores': scores,
+            'video_url': room.get('video_url'),
+            'finalized_at': datetime.now().astimezone(),
+        })
+    except queue.Full:
+        print(f"[ROUNDS] History queue full, round {round_id} in room {room_code} not saved")
+
+
+def _scoring_round_filters(room_code=None, day=None):
+    """WHERE clause and params for round history queries.
+
+    `day` (YYYY-MM-DD) is a competition day in server local time.
+    """
+    clauses = []
+    params = []
+    if room_code:
+        clauses.append('room_code = %s')
+        params.append(room_code)
+    if day:
+        start = datetime.fromisoformat(day).astimezone()
+        clauses.append('finalized_at >= %s AND finalized_at < %s')
+        params += [start, start + timedelta(days=1)]
+    return clauses, params
+
+
+def _scoring_round_row(row):
+    return {
+        'round_id': row['round_id'],
+        'room_code': row['room_code'],
+        'scoring_type': row['scoring_type'],
+        'event_judge_name': row['event_judge_name'],
+        'judges': json.loads(row['judges']),
+        'scores': json.loads(row['scores']),
+        'video_url': row['video_url'],
+        'finalized_at': _format_timestamp(row['finalized_at'])
+    }
+
+
+def get_scoring_rounds(room_code=None, day=None, before=None, limit=50):
+    """Get finalized rounds, newest first, one page at a time.
+
+    `before` is the `next` cursor from the previous page. Returns
+    (rounds, next_cursor); next_cursor is None on the last page.
+    """
+    clauses, params = _scoring_round_filters(room_code, day)
+    if before:
+        micros, round_id = before.split('|', 1)
+        clauses.append('(finalized_at, round_id) < (%s, %s)')
+        params += [_CURSOR_EPOCH + timedelta(microseconds=int(micros)), round_id]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    db = get_db()
+    cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor.execute(f'''
+        SELECT * FROM scoring_rounds {where}
+        ORDER BY finalized_at DESC, round_id DESC
+        LIMIT %s
+    ''', params + [limit + 1])
+    rows = cursor.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        micros = (rows[-1]['finalized_at'] - _CURSOR_EPOCH) // timedelta(microseconds=1)
+        next_cursor = f"{micros}|{rows[-1]['round_id']}"
+    return [_scoring_round_row(row) for row in rows], next_cursor
+
+
+def iter_scoring_rounds_csv(room_code=None, day=None):
+    """Yield round history as CSV text, one row per judge per round, oldest first.
+
+    Reads through a server-side cursor on its own pooled connection, so
+    memory stays flat however long the history is.
+    """
+    clauses, params = _scoring_round_filters(room_code, day)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['round_id', 'finalized_at', 'room_code', 'scoring_type', 'event_judge_name',
+                     'video_url', 'judge', 'judge_name'] + ROUND_HISTORY_CSV_FIELDS)
+    conn = db_pool.getconn()
+    try:
+        cursor = conn.cursor(name='scoring_rounds_export', cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.itersize = 500
+        cursor.execute(f'SELECT * FROM scoring_rounds {where} ORDER BY finalized_at, round_id', params)
+        for row in cursor:
+            judges = json.loads(row['judges'])
+            for judge, scores in sorted(json.loads(row['scores']).items(), key=lambda item: int(item[0])):
+                if not scores:
+                    continue
+                writer.writerow([row['round_id'], _format_timestamp(row['finalized_at']), row['room_code'],
+                                 row['scoring_type'], row['event_judge_name'] or '', row['video_url'] or '',
+                                 judge, judges.get(judge, {}).get('name', '')]
+                                + [scores.get(field, '') for field in ROUND_HISTORY_CSV_FIELDS])
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db_pool.putconn(conn)
+
+
+# --- Results snapshots (static files, rewritten on finalize) ---
+#
+# Each finalize writes the room's recent round history as a new immutable
+# pair of files, RESULTS_DIR/{room}/v{n}-{hash}.json and .html, then points
+# {room}/latest.json at them. Public boards poll the tiny pointer and fetch
+# a version only when it changes, so they can be served by a proxy or CDN
+# straight from RESULTS_DIR (a shared volume when scoring runs on several
+# hosts). /results/... serves the same files with matching cache headers.
+
+RESULTS_DIR = os.environ.get('RESULTS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results'))
+RESULTS_SNAPSHOT_ROUNDS = int(os.environ.get('RESULTS_SNAPSHOT_ROUNDS', 200))
+RESULTS_POINTER_MAX_AGE = int(os.environ.get('RESULTS_POINTER_MAX_AGE', 5))
+RESULTS_KEEP_VERSIONS = 10  # older versions are deleted once no pointer can reference them
+_RESULTS_NAME_RE = re.compile(r'v(\d+)-([0-9a-f]{16})\.(json|html)')
+
+
+def _write_file_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_results_snapshot(room_code, round_entry):
+    """Add a finalized round to the room's results and publish a new snapshot version.
+
+    Returns the new pointer dict. The previous version supplies the history;
+    the first snapshot of a room is seeded from the round history table.
+    """
+    room_dir = os.path.join(RESULTS_DIR, room_code)
+    os.makedirs(room_dir, exist_ok=True)
+    with open(os.path.join(room_dir, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # one writer per room across workers
+        return _write_results_snapshot_locked(room_code, room_dir, round_entry)
+
+
+def _write_results_snapshot_locked(room_code, room_dir, round_entry):
+    pointer_path = os.path.join(room_dir, 'latest.json')
+    pointer = None
+    rounds = []
+    if os.path.exists(pointer_path):
+        with open(pointer_path) as f:
+            pointer = json.load(f)
+        with open(os.path.join(room_dir, pointer['json'])) as f:
+            rounds = json.load(f)['rounds']
+    elif DATABASE_URL:
+        try:
+            rounds, _ = get_scoring_rounds(room_code=room_code, limit=RESULTS_SNAPSHOT_ROUNDS)
+        except Exception as e:
+            print(f"[RESULTS] Could not seed history for {room_code}: {e}")
+    rounds = [round_entry] + [r for r in rounds if r['round_id'] != round_entry['round_id']]
+    rounds = rounds[:RESULTS_SNAPSHOT_ROUNDS]
+
+    version = (pointer['version'] if pointer else 0) + 1
+    generated_at = datetime.now().astimezone().isoformat()
+    snapshot = {'room_code': room_code, 'version': version, 'generated_at': generated_at, 'rounds': rounds}
+    body = json.dumps(snapshot, separators=(',', ':')).encode()
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    json_name = f'v{version}-{digest}.json'
+    html = render_template('results_board.html', room_code=room_code,
+                           room_name=PERMANENT_ROOMS.get(room_code, {}).get('name', ''),
+                           version=version, generated_at=generated_at, rounds=rounds,
+                           score_fields=WS_SCORE_FIELDS).encode()
+    html_name = f'v{version}-{hashlib.sha256(html).hexdigest()[:16]}.html'
+
+    # Immutable files first, then the pointer, so readers never see a missing version
+    _write_file_atomic(os.path.join(room_dir, json_name), body)
+    _write_file_atomic(os.path.join(room_dir, html_name), html)
+    pointer = {'version': version, 'json': json_name, 'html': html_name, 'generated_at': generated_at}
+    _write_file_atomic(pointer_path, json.dumps(pointer).encode())
+
+    for name in os.listdir(room_dir):
+        match = _RESULTS_NAME_RE.fullmatch(name)
+        if match and int(match.group(1)) <= version - RESULTS_KEEP_VERSIONS:
+            os.unlink(os.path.join(room_dir, name))
+    return pointer
+
+
+def publish_results_snapshot(room_code, round_entry):
+    """Write a results snapshot in the background so finalize doesn't wait on disk."""
+    def run():
+        with app.app_context():
+            try:
+                write_results_snapshot(room_code, round_entry)
+            except Exception as e:
+                print(f"[RESULTS] Error writing snapshot for {room_code}: {e}")
+    if SOCKETIO_ENABLED and socketio:
+        socketio.start_background_task(run)
+    else:
+        threading.Thread(target=run, name='results-snapshot', daemon=True).start()
+
+
+@app.route('/results/<room_code>/<name>')
+def results_snapshot_file(room_code, name):
+    """Serve a results snapshot: versions are immutable, the pointer is short-lived."""
+    if not re.fullmatch(r'[A-Za-z0-9]+', room_code):
+        return jsonify({'error': 'Not found'}), 404
+    room_dir = os.path.join(RESULTS_DIR, room_code)
+    if name == 'latest.json':
+        response = send_from_directory(room_dir, name, max_age=RESULTS_POINTER_MAX_AGE)
+        response.cache_control.public = True
+        return response
+    match = _RESULTS_NAME_RE.fullmatch(name)
+    if not match:
+        return jsonify({'error': 'Not found'}), 404
+    # The content hash in the name is a strong ETag
+    response = send_from_directory(room_dir, name, etag=match.group(2), max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 # --- HTTP routes for scoring ---
 
 @app.route('/scoring/create', methods=['POST'])
@@ -2317,7 +4919,25 @@ def ws_scoring_join_page(room_code):
                            is_permanent=room.get('permanent', False),
                            room_name=PERMANENT_ROOMS.get(room_code, {}).get('name', ''),
                            allowed_types=room.get('allowed_types'),
-                           score_fields=WS_SCORE_FIELDS)
+                           score_fields=WS_SCORE_FIELDS,
+                           heartbeat_interval=WS_HEARTBEAT_INTERVAL,
+                           mark_types=MARK_SCORING_TYPES,
+                           socket_url=scoring_shard_url(room_code))
+
+
+@app.route('/scoring/<room_code>/scoreboard')
+def ws_scoring_scoreboard_page(room_code):
+    """Read-only live scoreboard for venue screens (no login required)."""
+    room = _get_ws_room(room_code)
+    if not room:
+        return "Room not found", 404
+
+    return render_template('scoreboard.html',
+                           room_code=room_code,
+                           room_name=PERMANENT_ROOMS.get(room_code, {}).get('name', ''),
+                           event_judge_name=room['event_judge_name'],
+                           score_fields=WS_SCORE_FIELDS,
+                           socket_url=scoring_shard_url(room_code))
 
 
 @app.route('/scoring/<room_code>/status')
@@ -2336,6 +4956,33 @@ def ws_scoring_room_status(room_code):
     })
 
 
+@app.route('/scoring/<room_code>/standings')
+def ws_scoring_standings(room_code):
+    """Leaderboard: cumulative by default, or one round's totals with ?round=N."""
+    try:
+        round_num = max(int(request.args.get('round', 0)), 0)
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'round and limit must be numbers'}), 400
+
+    if not _ws_room_exists(room_code):
+        return jsonify({'error': 'Room not found'}), 404
+
+    return jsonify({'round': round_num, 'standings': _get_ws_standings(room_code, limit, round_num)})
+
+
+@app.route('/scoring/<room_code>/standings/reset', methods=['POST'])
+@login_required
+def ws_scoring_reset_standings(room_code):
+    """Clear a room's standings before a new event."""
+    if not _ws_room_exists(room_code):
+        return jsonify({'error': 'Room not found'}), 404
+
+    _reset_ws_standings(room_code)
+    _mark_ws_spectators(room_code)
+    return jsonify({'success': True})
+
+
 @app.route('/scoring/attach-video', methods=['POST'])
 @login_required
 def ws_scoring_attach_video():
@@ -2351,9 +4998,7 @@ def ws_scoring_attach_video():
     if video_url:
         video = _resolve_video_url(video_url)
         if video:
-            room['video_url'] = video_url
-            room['video'] = video
-            _set_ws_room(room_code, room)
+            _update_ws_room(room_code, video_url=video_url, video=video)
             if SOCKETIO_ENABLED and socketio:
                 socketio.emit('ws_scoring_video_attached', video, room=room_code)
 
@@ -2379,10 +5024,53 @@ def list_permanent_rooms():
     return jsonify(result)
 
 
+@app.route('/scoring/rounds')
+@login_required
+def list_scoring_rounds():
+    """Finalized round history, newest first.
+
+    Filters: ?room=CODE, ?date=YYYY-MM-DD (competition day). Paginate with
+    ?limit= (max 200) and ?before=<next cursor from the previous page>.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+        rounds, next_cursor = get_scoring_rounds(room_code=request.args.get('room'),
+                                                 day=request.args.get('date'),
+                                                 before=request.args.get('before'),
+                                                 limit=limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid date, limit or cursor'}), 400
+    return jsonify({'rounds': rounds, 'next': next_cursor})
+
+
+@app.route('/scoring/rounds.csv')
+@login_required
+def export_scoring_rounds():
+    """Stream round history as CSV (?room=CODE and/or ?date=YYYY-MM-DD)."""
+    room_code = request.args.get('room')
+    day = request.args.get('date')
+    try:
+        if day:
+            datetime.fromisoformat(day)
+    except ValueError:
+        return jsonify({'error': 'Invalid date'}), 400
+    filename = '_'.join(['scoring_rounds'] + [re.sub(r'[^\w-]', '', part) for part in (room_code, day) if part]) + '.csv'
+    return Response(iter_scoring_rounds_csv(room_code, day), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
 # --- Socket.IO event handlers ---
 
 if SOCKETIO_ENABLED:
 
+    def _ws_moved(room_code):
+        """Send the client to the room's owning shard if that isn't us. Returns True if moved."""
+        owner = scoring_shard_url(room_code)
+        if owner and SCORING_SHARD_URL and owner != SCORING_SHARD_URL:
+            emit('ws_scoring_moved', {'url': owner})
+            return True
+        return False
+
     @socketio.on('ws_scoring_join')
     def on_ws_scoring_join(data):
         """Judge joins a scoring room."""
@@ -2390,6 +5078,8 @@ if SOCKETIO_ENABLED:
         judge_num = int(data.get('judge_num', 0))
         judge_name = data.get('judge_name', 'Anonymous')
 
+        if _ws_moved(room_code):
+            return
         room = _get_ws_room(room_code)
         if not room:
             emit('ws_scoring_error', {'message': 'Room not found'})
@@ -2416,12 +5106,14 @@ if SOCKETIO_ENABLED:
 
         room.setdefault('judges', {})[judge_num] = {
             'name': judge_name,
-            'connected': True,
             'sid': request.sid,
             'confirmed': was_confirmed,
         }
         join_room(room_code)
-        _set_ws_room(room_code, room)
+        seq = _update_ws_judge(room_code, judge_num, **room['judges'][judge_num])
+        _set_ws_presence(room_code, judge_num, request.sid)
+        _index_ws_sid(request.sid, room_code, judge_num)
+        room['judges'][judge_num]['connected'] = True
 
         video_info = room.get('video')
         if not video_info and room.get('video_url'):
@@ -2432,23 +5124,25 @@ if SOCKETIO_ENABLED:
             'scoring_type': room['scoring_type'],
             'state': room['state'],
             'scores': room.get('scores', {}).get(judge_num, {}),
-            'completion': _ws_scoring_completion(room),
             'video': video_info,
         })
 
-        emit('ws_scoring_room_update', {
-            'judges': {str(k): {'name': v['name'], 'connected': v.get('connected', False), 'confirmed': v.get('confirmed', False)}
-                       for k, v in room['judges'].items()},
-            'state': room['state'],
-            'scores': {str(k): v for k, v in room.get('scores', {}).items()},
-            'completion': _ws_scoring_completion(room),
-        }, room=room_code)
+        # Full state for the joiner, just the changed seat for everyone else
+        emit('ws_scoring_snapshot', _ws_room_snapshot(room_code, _get_ws_room(room_code) or room))
+        _mark_ws_spectators(room_code)
+        emit('ws_scoring_judge_update', {
+            'seq': seq,
+            'judge_num': judge_num,
+            'judge': _ws_judge_info(room['judges'][judge_num]),
+        }, room=room_code, include_self=False)
 
     @socketio.on('ws_scoring_event_judge_join')
     def on_ws_scoring_event_judge_join(data):
         """Event judge connects to receive score updates."""
         room_code = data.get('room_code')
 
+        if _ws_moved(room_code):
+            return
         if not _ws_room_exists(room_code):
             emit('ws_scoring_error', {'message': 'Room not found'})
             return
@@ -2456,14 +5150,34 @@ if SOCKETIO_ENABLED:
         room = _get_ws_room(room_code)
         join_room(room_code)
 
-        emit('ws_scoring_room_update', {
-            'judges': {str(k): {'name': v['name'], 'connected': v.get('connected', False), 'confirmed': v.get('confirmed', False)}
-                       for k, v in room.get('judges', {}).items()},
-            'state': room['state'],
-            'scores': {str(k): v for k, v in room.get('scores', {}).items()},
-            'scoring_type': room['scoring_type'],
-            'completion': _ws_scoring_completion(room),
-        })
+        emit('ws_scoring_snapshot', _ws_room_snapshot(room_code, room))
+
+    @socketio.on('ws_scoring_spectate')
+    def on_ws_scoring_spectate(data):
+        """Read-only subscriber: gets throttled scoreboards, never judge deltas."""
+        room_code = data.get('room_code')
+        if _ws_moved(room_code):
+            return
+
+        room = _get_ws_room(room_code)
+        if not room:
+            emit('ws_scoring_error', {'message': 'Room not found'})
+            return
+
+        join_room(f'spectate:{room_code}')
+        emit('ws_scoring_scoreboard', json.dumps(_ws_scoreboard(room_code, room), separators=(',', ':')))
+
+    @socketio.on('ws_scoring_sync')
+    def on_ws_scoring_sync(data):
+        """Client noticed a gap in the update seq - send it the full room state."""
+        room_code = data.get('room_code')
+        if _ws_moved(room_code):
+            return
+        room = _get_ws_room(room_code)
+        if not room:
+            emit('ws_scoring_error', {'message': 'Room not found'})
+            return
+        emit('ws_scoring_snapshot', _ws_room_snapshot(room_code, room))
 
     @socketio.on('ws_scoring_set_type')
     def on_ws_scoring_set_type(data):
@@ -2491,23 +5205,40 @@ if SOCKETIO_ENABLED:
         room['panel_size'] = panel_size
         room['scores'] = {j: {} for j in range(1, panel_size + 1)}
         room['state'] = 'scoring'
-        _set_ws_room(room_code, room)
+        seq = _clear_ws_scores(room_code, scoring_type=new_type, panel_size=panel_size, state='scoring')
+        _clear_ws_marks(room_code, panel_size)
 
+        _mark_ws_spectators(room_code)
         emit('ws_scoring_type_changed', {
+            'seq': seq,
             'scoring_type': new_type,
             'panel_size': panel_size,
             'state': 'scoring',
             'scores': {str(k): v for k, v in room['scores'].items()},
-            'completion': _ws_scoring_completion(room),
         }, room=room_code)
 
-    @socketio.on('ws_scoring_submit')
-    def on_ws_scoring_submit(data):
-        """Judge submits/updates a score field."""
+    @socketio.on('ws_scoring_set_competitor')
+    def on_ws_scoring_set_competitor(data):
+        """Event judge names the competitor (team) whose jump is being scored."""
+        room_code = data.get('room_code')
+        competitor = str(data.get('competitor') or '').strip()[:100] or None
+
+        if not _ws_room_exists(room_code):
+            emit('ws_scoring_error', {'message': 'Room not found'})
+            return
+
+        seq = _update_ws_room(room_code, competitor=competitor)
+
+        _mark_ws_spectators(room_code)
+        emit('ws_scoring_competitor', {
+            'seq': seq,
+            'competitor': competitor,
+        }, room=room_code)
+
+    def _ws_submit_scores(data, scores):
+        """Validate and store a judge's partial score entry, then broadcast one update."""
         room_code = data.get('room_code')
         judge_num = int(data.get('judge_num', 0))
-        field = data.get('field')
-        value = data.get('value')
 
         room = _get_ws_room(room_code)
         if not room:
@@ -2523,34 +5254,113 @@ if SOCKETIO_ENABLED:
             emit('ws_scoring_error', {'message': 'Invalid judge position'})
             return
 
+        if not isinstance(scores, dict) or not scores:
+            emit('ws_scoring_error', {'message': 'No scores submitted'})
+            return
+
+        # Validate every field before writing any of them
         valid_fields = WS_SCORE_FIELDS.get(room['scoring_type'], {})
-        if field not in valid_fields:
-            emit('ws_scoring_error', {'message': f'Invalid field: {field}'})
+        validated_scores = {}
+        for field, value in scores.items():
+            if field not in valid_fields:
+                emit('ws_scoring_error', {'message': f'Invalid field: {field}'})
+                return
+
+            min_val, max_val = valid_fields[field]
+            try:
+                value = float(value) if value not in (None, '') else None
+            except (ValueError, TypeError):
+                value = None
+
+            if value is not None and (value < min_val or value > max_val):
+                emit('ws_scoring_error', {'message': f'{field} must be between {min_val} and {max_val}'})
+                return
+            validated_scores[field] = value
+
+        result = _update_ws_scores(room_code, judge_num, validated_scores)
+        if not result:
+            emit('ws_scoring_error', {'message': 'Room not found' if result is None else 'Scoring is locked'})
             return
+        seq, missing, complete_judges = result
 
-        min_val, max_val = valid_fields[field]
-        try:
-            value = float(value) if value not in (None, '') else None
-        except (ValueError, TypeError):
-            value = None
+        _mark_ws_spectators(room_code)
+        # Only this judge's scores changed, so send just those fields and their completion
+        emit('ws_scoring_score_update', {
+            'seq': seq,
+            'judge_num': judge_num,
+            'scores': validated_scores,
+            'completion': {str(judge_num): {'complete': not missing, 'missing': missing}},
+            'complete_judges': complete_judges,
+        }, room=room_code)
+
+    @socketio.on('ws_scoring_submit')
+    def on_ws_scoring_submit(data):
+        """Judge submits/updates a score field."""
+        _ws_submit_scores(data, {data.get('field'): data.get('value')})
+
+    @socketio.on('ws_scoring_submit_batch')
+    def on_ws_scoring_submit_batch(data):
+        """Judge submits/updates several score fields at once ({field: value, ...})."""
+        _ws_submit_scores(data, data.get('scores'))
+
+    @socketio.on('ws_scoring_marks')
+    def on_ws_scoring_marks(data):
+        """Judge sends a batch of timestamped marks (mark mode).
+
+        `add` and `remove` are delta-encoded marks (see scoring_marks.py). The
+        point total derived from the judge's marks is saved as their score,
+        and the room gets only this batch, not the judge's whole timeline.
+        """
+        room_code = data.get('room_code')
+        judge_num = int(data.get('judge_num', 0))
+
+        room = _get_ws_room(room_code)
+        if not room:
+            emit('ws_scoring_error', {'message': 'Room not found'})
+            return
 
-        if value is not None and (value < min_val or value > max_val):
-            emit('ws_scoring_error', {'message': f'{field} must be between {min_val} and {max_val}'})
+        field = MARK_SCORING_TYPES.get(room['scoring_type'])
+        if not field:
+            emit('ws_scoring_error', {'message': f"{room['scoring_type']} does not take marks"})
             return
 
-        if judge_num not in room.get('scores', {}):
-            room['scores'][judge_num] = {}
-        room['scores'][judge_num][field] = value
-        _set_ws_room(room_code, room)
+        if room['state'] != 'scoring':
+            emit('ws_scoring_error', {'message': 'Scoring is locked'})
+            return
 
-        completion = _ws_scoring_completion(room)
+        judge = room.get('judges', {}).get(judge_num)
+        if not judge or judge_num > room.get('panel_size', 3):
+            emit('ws_scoring_error', {'message': 'Judge not found in room'})
+            return
+        if judge.get('confirmed'):
+            emit('ws_scoring_error', {'message': 'Score already confirmed'})
+            return
+
+        try:
+            add = decode_marks(data.get('add') or [])
+            remove = decode_marks(data.get('remove') or [])
+        except ValueError as e:
+            emit('ws_scoring_error', {'message': str(e)})
+            return
+        if not add and not remove:
+            return
+
+        marks = _update_ws_marks(room_code, judge_num, add, remove)
+        points = min(count_points(marks), WS_SCORE_FIELDS[room['scoring_type']][field][1])
+        result = _update_ws_scores(room_code, judge_num, {field: points})
+        if not result:
+            emit('ws_scoring_error', {'message': 'Room not found' if result is None else 'Scoring is locked'})
+            return
+        seq, missing, complete_judges = result
 
+        _mark_ws_spectators(room_code)
         emit('ws_scoring_score_update', {
+            'seq': seq,
             'judge_num': judge_num,
-            'field': field,
-            'value': value,
-            'all_scores': {str(k): v for k, v in room['scores'].items()},
-            'completion': completion,
+            'scores': {field: points},
+            'completion': {str(judge_num): {'complete': not missing, 'missing': missing}},
+            'complete_judges': complete_judges,
+            'marks': {'add': encode_marks(add), 'remove': encode_marks(remove)},
         }, room=room_code)
 
     @socketio.on('ws_scoring_confirm')
@@ -2596,10 +5406,24 @@ if SOCKETIO_ENABLED:
                 return
             validated_scores[field] = val
 
+        # A judge who tapped marks is held to them, whatever the form sent
+        mark_field = MARK_SCORING_TYPES.get(room['scoring_type'])
+        if mark_field:
+            marks = _get_ws_marks(room_code, panel_size).get(judge_num)
+            if marks:
+                validated_scores[mark_field] = min(count_points(marks), valid_fields[mark_field][1])
+
         # Store scores and mark confirmed
+        result = _update_ws_scores(room_code, judge_num, validated_scores, confirm=True)
+        if not result:
+            emit('ws_scoring_error', {'message': 'Room not found' if result is None
+                                      else 'Cannot confirm - scoring not active'})
+            return
+        seq, missing, complete_judges = result
         room['scores'][judge_num] = validated_scores
         room['judges'][judge_num]['confirmed'] = True
-        _set_ws_room(room_code, room)
+        # Re-read after the write so judges confirming at the same time on other workers count
+        room = _get_ws_room(room_code) or room
 
         # Check if all connected judges confirmed
         all_confirmed = all(
@@ -2608,13 +5432,21 @@ if SOCKETIO_ENABLED:
             if j in room['judges'] and room['judges'][j].get('connected', False)
         )
 
+        # Result from the judges confirmed so far, and where it would place the competitor
+        provisional = aggregate_round(room['scoring_type'], _ws_confirmed_scores(room))
+        if provisional and room.get('competitor'):
+            provisional['rank'] = _ws_projected_rank(room_code, room['competitor'], provisional['total'])
+
+        _mark_ws_spectators(room_code)
         emit('ws_scoring_score_confirmed', {
+            'seq': seq,
             'judge_num': judge_num,
             'judge_name': room['judges'][judge_num]['name'],
             'scores': validated_scores,
-            'all_scores': {str(k): v for k, v in room['scores'].items()},
+            'completion': {str(judge_num): {'complete': not missing, 'missing': missing}},
+            'complete_judges': complete_judges,
             'all_confirmed': all_confirmed,
-            'confirmed_judges': {str(j): room['judges'][j].get('confirmed', False) for j in room['judges']},
+            'provisional': provisional,
         }, room=room_code)
 
     @socketio.on('ws_scoring_finalize')
@@ -2636,9 +5468,48 @@ if SOCKETIO_ENABLED:
                     emit('ws_scoring_error', {'message': f'J{j} has not confirmed their score'})
                     return
 
+        # Claim the round before writing anything, so a double click or a
+        # second event judge socket can't count it twice
+        # The round_id is fixed by the claim, so the round is saved and published once
+        round_id = str(uuid.uuid4())
+        claim_seq = _claim_ws_round(room_code, room.get('seq', 0), finalizing_round=round_id)
+        if claim_seq is None:
+            if room['state'] != 'finalizing':
+                emit('ws_scoring_error', {'message': 'Scores changed - check them and submit again'})
+            return
+        _mark_ws_spectators(room_code)
+        emit('ws_scoring_state_change', {
+            'seq': claim_seq,
+            'state': 'finalizing',
+        }, room=room_code)
+
         # Snapshot current scores + judges for overlay
         final_scores = {str(k): dict(v) for k, v in room['scores'].items()}
         final_judges = {str(j): {'name': info.get('name', '?')} for j, info in room['judges'].items()}
+        competitor = room.get('competitor')
+        result = aggregate_round(room['scoring_type'], _ws_confirmed_scores(room))
+        round_num = None
+        if result and competitor:
+            round_num = _add_ws_standing(room_code, competitor, result['total'])
+        standings = _get_ws_standings(room_code, STANDINGS_BROADCAST_TOP)
+        final_marks = {}
+        if room['scoring_type'] in MARK_SCORING_TYPES:
+            final_marks = {str(j): encode_marks(marks) for j, marks in _get_ws_marks(room_code, panel_size).items()}
+        queue_scoring_round(round_id, room_code, room, final_judges, final_scores)
+        publish_results_snapshot(room_code, {
+            'round_id': round_id,
+            'room_code': room_code,
+            'scoring_type': room['scoring_type'],
+            'event_judge_name': room.get('event_judge_name'),
+            'judges': final_judges,
+            'scores': final_scores,
+            'competitor': competitor,
+            'round_num': round_num,
+            'result': result,
+            'marks': final_marks,
+            'video_url': room.get('video_url'),
+            'finalized_at': _format_timestamp(datetime.now().astimezone()),
+        })
 
         # Reset room for next video (preserve panel_size and judges)
         room['scores'] = {j: {} for j in range(1, panel_size + 1)}
@@ -2647,12 +5518,27 @@ if SOCKETIO_ENABLED:
             room['judges'][j]['confirmed'] = False
         room.pop('video', None)
         room.pop('video_url', None)
-        _set_ws_room(room_code, room)
-
+        room.pop('competitor', None)
+        last_result = {'round_id': round_id, 'scoring_type': room['scoring_type'],
+                       'scores': final_scores, 'judges': final_judges,
+                       'competitor': competitor, 'round_num': round_num, 'result': result}
+        seq = _clear_ws_scores(room_code, unconfirm_judges=list(room['judges']), state='scoring',
+                               video=None, video_url=None, competitor=None, finalizing_round=None,
+                               last_result=last_result)
+        if final_marks:
+            _clear_ws_marks(room_code, panel_size)
+
+        _mark_ws_spectators(room_code)
         emit('ws_scoring_finalized', {
+            'seq': seq,
+            'round_id': round_id,
             'scores': final_scores,
             'judges': final_judges,
             'scoring_type': room['scoring_type'],
+            'competitor': competitor,
+            'round_num': round_num,
+            'result': result,
+            'standings': standings,
         }, room=room_code)
 
     @socketio.on('ws_scoring_lock')
@@ -2665,24 +5551,22 @@ if SOCKETIO_ENABLED:
             emit('ws_scoring_error', {'message': 'Room not found'})
             return
 
-        completion = _ws_scoring_completion(room)
         panel_size = room.get('panel_size', 3)
-        errors = []
-        for j in range(1, panel_size + 1):
-            if not completion[j]['complete']:
-                missing_str = ', '.join(completion[j]['missing'])
-                errors.append(f'J{j} missing: {missing_str}')
-
-        if errors:
+        if room.get('complete_judges', 0) < panel_size:
+            errors = []
+            for j, status in _ws_scoring_completion(room).items():
+                if not status['complete']:
+                    errors.append(f"J{j} missing: {', '.join(status['missing'])}")
             emit('ws_scoring_error', {'message': 'Cannot lock - ' + '; '.join(errors)})
             return
 
         room['state'] = 'complete'
-        _set_ws_room(room_code, room)
+        seq = _update_ws_room(room_code, state='complete')
 
+        _mark_ws_spectators(room_code)
         emit('ws_scoring_state_change', {
+            'seq': seq,
             'state': 'complete',
-            'completion': completion,
         }, room=room_code)
 
     @socketio.on('ws_scoring_reset')
@@ -2700,13 +5584,15 @@ if SOCKETIO_ENABLED:
         room['state'] = 'scoring'
         for j in room.get('judges', {}):
             room['judges'][j]['confirmed'] = False
-        _set_ws_room(room_code, room)
+        seq = _clear_ws_scores(room_code, unconfirm_judges=list(room.get('judges', {})), state='scoring')
+        _clear_ws_marks(room_code, panel_size)
 
+        _mark_ws_spectators(room_code)
         emit('ws_scoring_reset_all', {
+            'seq': seq,
             'state': 'scoring',
             'scores': {str(k): v for k, v in room['scores'].items()},
             'scoring_type': room['scoring_type'],
-            'completion': _ws_scoring_completion(room),
         }, room=room_code)
 
     @socketio.on('ws_scoring_leave')
@@ -2715,40 +5601,62 @@ if SOCKETIO_ENABLED:
         room_code = data.get('room_code')
         judge_num = int(data.get('judge_num', 0))
 
+        _pop_ws_sid(request.sid)
         room = _get_ws_room(room_code)
         if not room:
             return
 
-        if judge_num in room.get('judges', {}):
-            room['judges'][judge_num]['connected'] = False
-            _set_ws_room(room_code, room)
-
         leave_room(room_code)
-
-        emit('ws_scoring_room_update', {
-            'judges': {str(k): {'name': v['name'], 'connected': v.get('connected', False)}
-                       for k, v in room.get('judges', {}).items()},
-            'state': room['state'],
-            'scores': {str(k): v for k, v in room.get('scores', {}).items()},
-        }, room=room_code)
+        if judge_num in room.get('judges', {}) and _clear_ws_presence(room_code, judge_num, request.sid):
+            # Presence isn't part of the room's sequenced state, so no seq
+            room['judges'][judge_num]['connected'] = False
+            _mark_ws_spectators(room_code)
+            emit('ws_scoring_judge_update', {
+                'judge_num': judge_num,
+                'judge': _ws_judge_info(room['judges'][judge_num]),
+            }, room=room_code)
 
     @socketio.on('disconnect')
     def on_disconnect():
         """Handle unexpected disconnection - mark judge as disconnected."""
-        all_rooms = _get_all_ws_rooms()
-        for code, room in all_rooms.items():
-            for judge_num, judge in room.get('judges', {}).items():
-                if judge.get('sid') == request.sid and judge.get('connected'):
-                    judge['connected'] = False
-                    _set_ws_room(code, room)
-                    if SOCKETIO_ENABLED and socketio:
-                        socketio.emit('ws_scoring_room_update', {
-                            'judges': {str(k): {'name': v['name'], 'connected': v.get('connected', False)}
-                                       for k, v in room.get('judges', {}).items()},
-                            'state': room['state'],
-                            'scores': {str(k): v for k, v in room.get('scores', {}).items()},
-                        }, room=code)
-                    break
+        entry = _pop_ws_sid(request.sid)
+        if not entry:
+            return
+        code, judge_num = entry
+        # The seat may already belong to a newer socket (judge reconnected)
+        if not _clear_ws_presence(code, judge_num, request.sid):
+            return
+        room = _get_ws_room(code)
+        judge = room.get('judges', {}).get(judge_num) if room else None
+        if judge:
+            _mark_ws_spectators(code)
+        if judge and SOCKETIO_ENABLED and socketio:
+            socketio.emit('ws_scoring_judge_update', {
+                'judge_num': judge_num,
+                'judge': _ws_judge_info(judge),
+            }, room=code)
+
+    @socketio.on('ws_scoring_heartbeat')
+    def on_ws_scoring_heartbeat(data):
+        """Keep a judge's presence alive and send the caller everyone's presence."""
+        room_code = data.get('room_code')
+        judge_num = int(data.get('judge_num') or 0)
+
+        if judge_num and _refresh_ws_presence(room_code, judge_num, request.sid) == 2:
+            # Timed out (e.g. its worker restarted) and is back: re-index and tell the room
+            _index_ws_sid(request.sid, room_code, judge_num)
+            room = _get_ws_room(room_code)
+            if room and judge_num in room.get('judges', {}):
+                _mark_ws_spectators(room_code)
+                emit('ws_scoring_judge_update', {
+                    'judge_num': judge_num,
+                    'judge': _ws_judge_info(room['judges'][judge_num]),
+                }, room=room_code)
+
+        room = _get_ws_room(room_code)
+        if room:
+            emit('ws_scoring_presence', {str(j): judge.get('connected', False)
+                                         for j, judge in room.get('judges', {}).items()})
 
     # Video sync events
     @socketio.on('ws_scoring_video_play')
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Grade paper answer sheets in bulk and store the results.
+
+Usage:
+    python batch_grade.py sheets.csv
+    python batch_grade.py sheets.ndjson --report report.csv
+
+Input is CSV (username, test_id, answers, sections[, timestamp] columns,
+with answers/sections as JSON objects keyed by question id), newline-delimited
+JSON, or a JSON array of sheets. Uses the same grading as /submit-test,
+spread over a process pool for large files, and writes all results in one
+transaction.
+"""
+
+import argparse
+import csv
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Grade paper answer sheets in bulk.')
+    parser.add_argument('sheets', help='CSV, NDJSON or JSON file of answer sheets ("-" for stdin)')
+    parser.add_argument('--format', choices=['csv', 'ndjson', 'json'],
+                        help='Input format (default: from file extension)')
+    parser.add_argument('--report', help='Write the per-row report as CSV to this file (default: stdout)')
+    args = parser.parse_args()
+
+    fmt = args.format
+    if not fmt:
+        name = args.sheets.lower()
+        fmt = 'csv' if name.endswith('.csv') else 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'json'
+    if args.sheets == '-':
+        text = sys.stdin.read()
+    else:
+        with open(args.sheets, encoding='utf-8-sig') as f:
+            text = f.read()
+
+    # Imported here so process-pool children (which re-import this module)
+    # don't initialize the whole app
+    from app import app, parse_answer_sheets, grade_answer_sheets
+
+    sheets = parse_answer_sheets(text, fmt)
+    if not isinstance(sheets, list) or not all(isinstance(sheet, dict) for sheet in sheets):
+        print('Expected a list of answer sheets', file=sys.stderr)
+        return 1
+
+    with app.app_context():
+        report = grade_answer_sheets(sheets, processes=True)
+
+    out = open(args.report, 'w', newline='') if args.report else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=['row', 'username', 'test_id', 'status', 'result_id',
+                                                 'score', 'passed', 'error'])
+        writer.writeheader()
+        writer.writerows(report)
+    finally:
+        if args.report:
+            out.close()
+
+    graded = sum(1 for entry in report if entry.get('status') == 'graded')
+    print(f"Graded {graded} of {len(report)} sheets", file=sys.stderr)
+    return 0 if graded == len(report) else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Grading for USPA judge tests.
+
+Kept free of Flask and database imports so the same code can grade web
+submissions, batch uploads and regrades.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# MC correct = 3.5 pts, Reference correct = 0.5 pts (max 4 pts per question)
+MC_POINTS = 3.5
+REF_POINTS = 0.5
+QUESTION_POINTS = 4
+
+_SECTION_PREFIXES = ('section', 'sec.', 'sec', 'ch.', 'ch', 'chapter')
+_DASH_RE = re.compile(r'[–—−]')  # en dash, em dash, minus sign
+_SEPARATOR_RE = re.compile(r'[\s.\-_]+')
+
+
+@lru_cache(maxsize=8192)
+def normalize_section_ref(section):
+    """Normalize section reference to allow formatting flexibility.
+
+    Handles variations like:
+    - "8-1.3.1" vs "8.1.3.1" vs "8 1 3 1"
+    - "Section 8-1.3.1" vs "8-1.3.1"
+    - "Sec. 8-1.3.1" vs "8-1.3.1"
+    - Trailing punctuation
+    - Various dash types (em dash, en dash, hyphen)
+    """
+    if not section:
+        return ''
+
+    s = section.strip().lower()
+
+    # Remove common prefixes
+    for prefix in _SECTION_PREFIXES:
+        if s.startswith(prefix):
+            s = s[len(prefix):].strip()
+
+    # Normalize various dash types to hyphen
+    s = _DASH_RE.sub('-', s)
+
+    # Remove all separators and spaces, keep only alphanumeric
+    s = _SEPARATOR_RE.sub('', s)
+
+    # Remove trailing punctuation
+    s = s.rstrip('.,;:')
+
+    return s
+
+
+# Everything grading needs from a test, precomputed once per test version
+AnswerKey = namedtuple('AnswerKey', [
+    'question_ids',   # str ids, as used for keys in submitted answers/sections
+    'correct',        # correct option index per question
+    'sections',       # normalized correct section per question
+    'total_possible',
+])
+
+
+def compile_answer_key(questions):
+    """Build the answer key for a list of questions."""
+    return AnswerKey(
+        question_ids=tuple(str(q['id']) for q in questions),
+        correct=tuple(q['correct'] for q in questions),
+        sections=tuple(normalize_section_ref(q['correct_section']) for q in questions),
+        total_possible=len(questions) * QUESTION_POINTS,  # 100 points
+    )
+
+
+def compute_score(total_points, total_possible):
+    """Percentage score, rounded the way results have always been stored."""
+    return round((total_points / total_possible) * 100, 1)
+
+
+def grade_submission(questions, answer_key, answers, sections):
+    """Grade one answer sheet.
+
+    Returns (results, total_points) where results is the per-question
+    breakdown stored with the test result.
+    """
+    total_points = 0
+    results = []
+    for q, q_id, correct, correct_section in zip(
+            questions, answer_key.question_ids, answer_key.correct, answer_key.sections):
+        user_answer = answers.get(q_id)
+        user_section = sections.get(q_id, '')
+
+        is_correct = user_answer == correct
+        is_section_correct = normalize_section_ref(user_section) == correct_section
+
+        question_points = 0
+        if is_correct:
+            question_points += MC_POINTS
+        if is_section_correct:
+            question_points += REF_POINTS
+        total_points += question_points
+
+        results.append({
+            'id': q['id'],
+            'question': q['question'],
+            'user_answer': user_answer,
+            'correct_answer': correct,
+            'is_correct': is_correct,
+            'user_section': user_section,
+            'correct_section': q['correct_section'],
+            'is_section_correct': is_section_correct,
+            'question_points': question_points,
+            'options': q['options']
+        })
+    return results, total_points
+
+
+def grade_sheets(questions, answer_key, sheets):
+    """Grade a list of (answers, sections) sheets for one test.
+
+    A module-level function so it can be shipped to a process pool.
+    """
+    return [grade_submission(questions, answer_key, answers, sections)
+            for answers, sections in sheets]
+
+
+def regrade_answers(answer_key, correct_sections, question_ids, user_answers, user_sections, approved):
+    """Re-evaluate stored answers against an answer key, vectorized.
+
+    All per-answer inputs are parallel sequences, one entry per stored
+    answer across any number of results: question_ids (int), user_answers
+    (int, -1 when unanswered), user_sections (raw text) and approved (True
+    where an examiner approved the reference). correct_sections holds the
+    raw correct_section text for each question in the key.
+
+    Returns a dict of per-answer arrays: in_key (question still exists),
+    is_correct, is_section_correct, question_points, correct_answer and
+    correct_section. Entries with in_key False should keep their old grading.
+    """
+    question_ids = np.asarray(question_ids, dtype=np.int64)
+    user_answers = np.asarray(user_answers, dtype=np.int64)
+    approved = np.asarray(approved, dtype=bool)
+
+    # Map each stored answer to its question's position in the key
+    key_ids = np.array([int(q_id) for q_id in answer_key.question_ids], dtype=np.int64)
+    order = np.argsort(key_ids, kind='stable')
+    sorted_ids = key_ids[order]
+    pos = np.clip(np.searchsorted(sorted_ids, question_ids), 0, max(len(sorted_ids) - 1, 0))
+    if len(sorted_ids):
+        in_key = sorted_ids[pos] == question_ids
+        key_index = order[pos]
+    else:
+        in_key = np.zeros(len(question_ids), dtype=bool)
+        key_index = np.zeros(len(question_ids), dtype=np.int64)
+
+    key_correct = np.array(answer_key.correct, dtype=np.int64)
+    key_sections = np.array(answer_key.sections, dtype=str)
+    key_raw_sections = np.array(correct_sections, dtype=object)
+    if not len(key_correct):
+        key_correct = np.zeros(1, dtype=np.int64)
+        key_sections = np.array([''], dtype=str)
+        key_raw_sections = np.array([''], dtype=object)
+
+    correct_answer = key_correct[key_index]
+    is_correct = in_key & (user_answers == correct_answer)
+
+    # Normalize each distinct submitted reference once, then compare in bulk
+    unique_sections, inverse = np.unique(np.asarray(user_sections, dtype=str), return_inverse=True)
+    normalized = np.array([normalize_section_ref(s) for s in unique_sections.tolist()], dtype=str)
+    if not len(normalized):
+        normalized = np.array([''], dtype=str)
+    is_section_correct = in_key & ((normalized[inverse] == key_sections[key_index]) | approved)
+
+    question_points = is_correct * MC_POINTS + is_section_correct * REF_POINTS
+    return {
+        'in_key': in_key,
+        'is_correct': is_correct,
+        'is_section_correct': is_section_correct,
+        'question_points': question_points,
+        'correct_answer': correct_answer,
+        'correct_section': key_raw_sections[key_index],
+    }
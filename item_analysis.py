@@ -0,0 +1,115 @@
+"""Item analysis for the question bank.
+
+Per-question statistics are kept as additive sums (attempts, correct
+answers, rest-score moments, option picks) so they can be updated one
+result at a time with plain SQL increments, or rebuilt from scratch with
+the vectorized `aggregate_item_sums`. `item_statistics` turns the sums into
+the figures reviewers look at.
+
+Like grading.py, this module has no Flask or database imports.
+"""
+
+import math
+
+import numpy as np
+
+# Rule-of-thumb limits for flagging an item for review
+MIN_P_VALUE = 0.30         # fewer than 30% answer correctly: too hard or miskeyed
+MAX_P_VALUE = 0.95         # almost everyone answers correctly: says little
+MIN_DISCRIMINATION = 0.15  # strong candidates barely outperform weak ones
+
+# Sum columns stored per question, in the order aggregate_item_sums returns them
+SUM_FIELDS = ('attempts', 'correct', 'section_correct', 'rest_sum', 'rest_sq_sum', 'rest_correct_sum')
+
+
+def aggregate_item_sums(question_ids, user_answers, is_correct, is_section_correct, rest_scores):
+    """Aggregate per-answer arrays into per-question sums, vectorized.
+
+    Inputs are parallel sequences with one entry per stored answer:
+    question_ids (int), user_answers (int, -1 when unanswered), is_correct,
+    is_section_correct and rest_scores (the result's score with this
+    question's own points taken out, in percent).
+
+    Returns (sums, option_picks): sums maps question_id to a dict of
+    SUM_FIELDS, option_picks maps (question_id, option) to a pick count.
+    """
+    question_ids = np.asarray(question_ids, dtype=np.int64)
+    user_answers = np.asarray(user_answers, dtype=np.int64)
+    is_correct = np.asarray(is_correct, dtype=bool)
+    is_section_correct = np.asarray(is_section_correct, dtype=bool)
+    rest_scores = np.asarray(rest_scores, dtype=float)
+    if not len(question_ids):
+        return {}, {}
+
+    keys, index = np.unique(question_ids, return_inverse=True)
+    n = len(keys)
+    columns = (
+        np.bincount(index, minlength=n),
+        np.bincount(index, weights=is_correct, minlength=n),
+        np.bincount(index, weights=is_section_correct, minlength=n),
+        np.bincount(index, weights=rest_scores, minlength=n),
+        np.bincount(index, weights=rest_scores ** 2, minlength=n),
+        np.bincount(index, weights=rest_scores * is_correct, minlength=n),
+    )
+    sums = {}
+    for i, q_id in enumerate(keys.tolist()):
+        sums[q_id] = {field: column[i].item() for field, column in zip(SUM_FIELDS, columns)}
+        for field in ('attempts', 'correct', 'section_correct'):
+            sums[q_id][field] = int(sums[q_id][field])
+
+    answered = user_answers >= 0
+    pairs, picks = np.unique(np.stack([question_ids[answered], user_answers[answered]], axis=1),
+                             axis=0, return_counts=True)
+    option_picks = {(int(q_id), int(option)): int(count)
+                    for (q_id, option), count in zip(pairs.tolist(), picks.tolist())}
+    return sums, option_picks
+
+
+def item_statistics(sums, option_picks, correct_option, num_options, min_attempts=1):
+    """Derive reviewer-facing statistics for one question from its sums.
+
+    `option_picks` maps option index to pick count for this question.
+    Returns a dict with attempts, p_value (share answering correctly),
+    discrimination (point-biserial correlation between answering correctly
+    and the rest of the test score), reference_accuracy, option_rates
+    (share picking each option), unanswered_rate and the list of reasons
+    the item needs review (empty below `min_attempts`).
+    """
+    attempts = sums.get('attempts', 0)
+    if attempts <= 0:
+        return None
+    correct = sums['correct']
+    p = correct / attempts
+
+    discrimination = None
+    mean = sums['rest_sum'] / attempts
+    variance = sums['rest_sq_sum'] / attempts - mean * mean
+    if 0 < correct < attempts and variance > 1e-9:
+        mean_correct = sums['rest_correct_sum'] / correct
+        mean_incorrect = (sums['rest_sum'] - sums['rest_correct_sum']) / (attempts - correct)
+        discrimination = round((mean_correct - mean_incorrect) / math.sqrt(variance)
+                               * math.sqrt(p * (1 - p)), 3)
+
+    option_rates = [round(option_picks.get(i, 0) / attempts, 3) for i in range(num_options)]
+    answered = sum(option_picks.values())
+
+    review = []
+    if attempts >= min_attempts:
+        if p < MIN_P_VALUE:
+            review.append('hard')
+        elif p > MAX_P_VALUE:
+            review.append('easy')
+        if discrimination is not None and discrimination < MIN_DISCRIMINATION:
+            review.append('low discrimination')
+        if any(rate > p for i, rate in enumerate(option_rates) if i != correct_option):
+            review.append('distractor outdraws key')
+
+    return {
+        'attempts': attempts,
+        'p_value': round(p, 3),
+        'discrimination': discrimination,
+        'reference_accuracy': round(sums['section_correct'] / attempts, 3),
+        'option_rates': option_rates,
+        'unanswered_rate': round(max(attempts - answered, 0) / attempts, 3),
+        'review': review
+    }
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Load-test the live scoring rooms over Socket.IO.
+
+Usage:
+    python loadtest_scoring.py --rooms 8 --rounds 5
+    python loadtest_scoring.py --rooms 20 --workers 4 --redis-url redis://localhost:6379/15
+    python loadtest_scoring.py --url http://127.0.0.1:8000 --secret-key "$SECRET_KEY" --rooms 4
+
+Unless --url is given, starts the app under gunicorn with the Procfile's
+worker class on a free port. Creates N rooms and drives each one with a full
+judge panel plus an event judge. Each round is: a burst of
+ws_scoring_submit per judge, ws_scoring_confirm, ws_scoring_finalize, then a
+storm of video seeks. Reports p50/p95/p99 latency from emitting an event
+to receiving its broadcast, event throughput, and server memory per room.
+
+Without --redis-url, the server shares rooms through the local SQLite store,
+so multi-worker runs need no Redis. Point --redis-url at a scratch database:
+the rooms created here are left behind. Needs the asyncio Socket.IO client
+(pip install "python-socketio[asyncio_client]").
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_CLASS = 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+
+
+class Recorder:
+    """Latency samples, errors and message counts for one run."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.sent = 0
+        self.received = 0
+
+    def add(self, kind, seconds):
+        self.latencies[kind].append(seconds)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class ScoringClient:
+    """One Socket.IO connection to a room, as a judge or the event judge."""
+
+    EVENTS = ('ws_scoring_joined', 'ws_scoring_snapshot', 'ws_scoring_score_update',
+              'ws_scoring_score_confirmed', 'ws_scoring_finalized', 'ws_scoring_judge_update',
+              'ws_scoring_state_change', 'ws_scoring_reset_all', 'ws_scoring_type_changed')
+
+    def __init__(self, url, room_code, recorder, timeout):
+        import socketio
+        self.url = url
+        self.room_code = room_code
+        self.recorder = recorder
+        self.timeout = timeout
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self._waiting = []  # (event, match, future)
+        for event in self.EVENTS:
+            self.sio.on(event, self._handler(event))
+        self.sio.on('ws_scoring_video_seek', self._on_seek)
+        self.sio.on('ws_scoring_error', self._on_error)
+
+    def _handler(self, event):
+        async def handle(data):
+            self.recorder.received += 1
+            for entry in list(self._waiting):
+                waiting_for, match, future = entry
+                if waiting_for == event and not future.done() and (match is None or match(data)):
+                    future.set_result(data)
+                    self._waiting.remove(entry)
+                    break
+        return handle
+
+    async def _on_seek(self, data):
+        # The event judge sends its wall clock as the video time
+        self.recorder.received += 1
+        self.recorder.add('video_seek', max(time.time() - float(data.get('time', 0)), 0))
+
+    async def _on_error(self, data):
+        self.recorder.received += 1
+        self.recorder.errors[data.get('message', 'error')] += 1
+        for _, _, future in self._waiting:
+            if not future.done():
+                future.set_exception(RuntimeError(data.get('message', 'error')))
+        self._waiting.clear()
+
+    async def connect(self):
+        await self.sio.connect(self.url, transports=['websocket'])
+
+    async def request(self, kind, event, data, reply, match=None):
+        """Emit an event and time it until the matching broadcast arrives."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append((reply, match, future))
+        started = time.perf_counter()
+        await self.sio.emit(event, dict(data, room_code=self.room_code))
+        self.recorder.sent += 1
+        try:
+            result = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.recorder.errors[f'{kind} timed out'] += 1
+            return None
+        except RuntimeError:
+            return None  # counted by _on_error
+        self.recorder.add(kind, time.perf_counter() - started)
+        return result
+
+    async def emit(self, event, data):
+        await self.sio.emit(event, dict(data, room_code=self.room_code))
+        self.recorder.sent += 1
+
+    async def close(self):
+        await self.sio.disconnect()
+
+
+async def run_room(url, room_code, args, recorder):
+    """Drive one room through the configured number of rounds."""
+    event_judge = ScoringClient(url, room_code, recorder, args.timeout)
+    await event_judge.connect()
+    snapshot = await event_judge.request('event_judge_join', 'ws_scoring_event_judge_join', {},
+                                         'ws_scoring_snapshot')
+    if not snapshot:
+        await event_judge.close()
+        return
+    panel_size = snapshot['panel_size']
+    fields = snapshot['completion']['1']['missing']
+
+    judges = {j: ScoringClient(url, room_code, recorder, args.timeout) for j in range(1, panel_size + 1)}
+    await asyncio.gather(*(judge.connect() for judge in judges.values()))
+    await asyncio.gather(*(judge.request('join', 'ws_scoring_join',
+                                         {'judge_num': j, 'judge_name': f'Load {room_code} J{j}'},
+                                         'ws_scoring_joined')
+                           for j, judge in judges.items()))
+
+    async def score(j, judge):
+        def mine(data):
+            return data.get('judge_num') == j
+
+        for i in range(args.submits):
+            await judge.request('submit', 'ws_scoring_submit',
+                                {'judge_num': j, 'field': fields[i % len(fields)], 'value': i % 4},
+                                'ws_scoring_score_update', mine)
+        await judge.request('confirm', 'ws_scoring_confirm',
+                            {'judge_num': j, 'scores': {field: 1 for field in fields}},
+                            'ws_scoring_score_confirmed', mine)
+
+    try:
+        for _ in range(args.rounds):
+            await asyncio.gather(*(score(j, judge) for j, judge in judges.items()))
+            await event_judge.request('finalize', 'ws_scoring_finalize', {}, 'ws_scoring_finalized')
+            for _ in range(args.seeks):
+                await event_judge.emit('ws_scoring_video_seek', {'time': time.time()})
+            await asyncio.sleep(0.05)  # let the seek storm drain before the next round
+    finally:
+        await asyncio.gather(*(client.close() for client in [event_judge, *judges.values()]),
+                             return_exceptions=True)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, workdir, secret_key):
+    """Start the app under gunicorn; returns (process, base url, log path)."""
+    port = free_port()
+    log_path = os.path.join(workdir, 'server.log')
+    env = dict(os.environ,
+               SECRET_KEY=secret_key,
+               DATABASE_URL='',  # keep finalized rounds out of any real database
+               REDIS_URL=args.redis_url or '',
+               WS_ROOMS_FILE=os.path.join(workdir, 'rooms.json'),
+               WS_LOCAL_STORE=os.path.join(workdir, 'rooms.db'),
+               WS_LOCAL_BUS_DIR=os.path.join(workdir, 'bus'))
+    with open(log_path, 'w') as log:
+        proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-k', WORKER_CLASS,
+                                 '-w', str(args.workers), '--timeout', '120',
+                                 '--bind', f'127.0.0.1:{port}', 'app:app'],
+                                cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'Server exited during startup, see {log_path}')
+        try:
+            urllib.request.urlopen(url + '/scoring/FS1/status', timeout=2).close()
+            return proc, url, log_path
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f'Server did not start within 60s, see {log_path}')
+
+
+def session_cookie(secret_key):
+    """A signed Flask session for an admin, so the harness can create rooms."""
+    from flask import Flask
+    from flask.sessions import SecureCookieSessionInterface
+    signer = Flask('loadtest')
+    signer.secret_key = secret_key
+    return SecureCookieSessionInterface().get_signing_serializer(signer).dumps(
+        {'user': 'loadtest', 'role': 'admin', 'name': 'Load Test'})
+
+
+def create_room(url, cookie, scoring_type):
+    request = urllib.request.Request(url + '/scoring/create', method='POST',
+                                     data=json.dumps({'scoring_type': scoring_type}).encode(),
+                                     headers={'Content-Type': 'application/json',
+                                              'Cookie': f'session={cookie}'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        body = response.read()
+    try:
+        return json.loads(body)['room_code']
+    except (ValueError, KeyError):
+        raise RuntimeError('Could not create a room (wrong --secret-key?)')
+
+
+def process_tree_rss(root_pid):
+    """Resident memory in bytes of a process and all its descendants (Linux)."""
+    children = defaultdict(list)
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            children[parent].append(int(entry))
+        except (OSError, ValueError, IndexError):
+            pass
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children[pid])
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return total
+
+
+def memory_sampler(proc, redis_client):
+    """Return a function sampling (server RSS, Redis used_memory), either may be None."""
+    def sample():
+        rss = process_tree_rss(proc.pid) if proc and os.path.isdir('/proc') else None
+        used = None
+        if redis_client is not None:
+            try:
+                used = redis_client.info('memory')['used_memory']
+            except Exception:
+                pass
+        return rss, used
+    return sample
+
+
+async def run(args, url, sample):
+    recorder = Recorder()
+    cookie = session_cookie(args.secret_key)
+    base = sample()
+    codes = [create_room(url, cookie, args.scoring_type) for _ in range(args.rooms)]
+
+    peak = list(base)
+    done = asyncio.Event()
+
+    async def watch_memory():
+        while not done.is_set():
+            for i, value in enumerate(sample()):
+                if value is not None and (peak[i] is None or value > peak[i]):
+                    peak[i] = value
+            await asyncio.sleep(0.5)
+
+    watcher = asyncio.create_task(watch_memory())
+    started = time.perf_counter()
+    await asyncio.gather(*(run_room(url, code, args, recorder) for code in codes))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await watcher
+    return recorder, elapsed, base, peak
+
+
+def report(args, recorder, elapsed, base, peak):
+    """Print the summary and return it as a dict."""
+    summary = {'rooms': args.rooms, 'rounds': args.rounds, 'workers': args.workers,
+               'store': 'redis' if args.redis_url else 'local', 'elapsed_s': round(elapsed, 3),
+               'events_per_s': round(recorder.sent / elapsed, 1) if elapsed else None,
+               'broadcasts_per_s': round(recorder.received / elapsed, 1) if elapsed else None,
+               'latency_ms': {}, 'errors': dict(recorder.errors)}
+    print(f"\n{args.rooms} rooms, {args.rounds} rounds, {args.workers} workers, "
+          f"{summary['store']} store, {elapsed:.1f}s")
+    print(f"{'event':<18}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind in ('event_judge_join', 'join', 'submit', 'confirm', 'finalize', 'video_seek'):
+        values = recorder.latencies.get(kind, [])
+        if not values:
+            continue
+        stats = {'count': len(values), 'p50': percentile(values, 50) * 1000, 'p95': percentile(values, 95) * 1000,
+                 'p99': percentile(values, 99) * 1000, 'max': max(values) * 1000}
+        summary['latency_ms'][kind] = {k: round(v, 2) for k, v in stats.items()}
+        print(f"{kind:<18}{stats['count']:>8}{stats['p50']:>10.1f}{stats['p95']:>10.1f}"
+              f"{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+    print(f"Throughput: {summary['events_per_s']} events/s sent, {summary['broadcasts_per_s']} broadcasts/s received")
+
+    for i, (label, key) in enumerate((('Server RSS', 'server_rss'), ('Redis used_memory', 'redis_memory'))):
+        if base[i] is None or peak[i] is None:
+            continue
+        per_room = (peak[i] - base[i]) / max(args.rooms, 1)
+        summary[key] = {'base_bytes': base[i], 'peak_bytes': peak[i], 'per_room_bytes': round(per_room)}
+        print(f"{label}: {base[i] / 2**20:.1f} MB idle, {peak[i] / 2**20:.1f} MB peak, "
+              f"{per_room / 1024:.1f} KB per room")
+    for message, count in sorted(recorder.errors.items()):
+        print(f"Error x{count}: {message}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the Socket.IO scoring rooms.')
+    parser.add_argument('--rooms', type=int, default=4, help='Concurrent rooms (default: 4)')
+    parser.add_argument('--rounds', type=int, default=3, help='Score/confirm/finalize cycles per room (default: 3)')
+    parser.add_argument('--submits', type=int, default=20, help='ws_scoring_submit events per judge per round')
+    parser.add_argument('--seeks', type=int, default=50, help='Video seeks per round (default: 50)')
+    parser.add_argument('--scoring-type', default='fs-points', help='Room scoring type (default: fs-points, 5 judges)')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers to start (default: 2)')
+    parser.add_argument('--redis-url', help='Run the server against this Redis (default: local SQLite store)')
+    parser.add_argument('--url', help='Test an already running server instead of starting one')
+    parser.add_argument('--secret-key', default=os.environ.get('SECRET_KEY'),
+                        help="With --url: the server's SECRET_KEY, used to sign an admin session")
+    parser.add_argument('--timeout', type=float, default=10, help='Seconds to wait for each broadcast')
+    parser.add_argument('--json', help='Also write the summary as JSON to this file')
+    args = parser.parse_args()
+
+    if args.url and not args.secret_key:
+        parser.error('--url needs --secret-key (or SECRET_KEY) to create rooms')
+
+    redis_client = None
+    if args.redis_url:
+        import redis
+        redis_client = redis.from_url(args.redis_url)
+
+    proc = None
+    with tempfile.TemporaryDirectory(prefix='loadtest-scoring-') as workdir:
+        if args.url:
+            url = args.url.rstrip('/')
+        else:
+            args.secret_key = secrets.token_hex(16)
+            proc, url, log_path = start_server(args, workdir, args.secret_key)
+            print(f"Server at {url} ({args.workers} workers), log: {log_path}", file=sys.stderr)
+        try:
+            recorder, elapsed, base, peak = asyncio.run(run(args, url, memory_sampler(proc, redis_client)))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    summary = report(args, recorder, elapsed, base, peak)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0 if not recorder.errors else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""Scoring-room storage shared by the workers on one host, for running without Redis.
+
+Rooms live in a SQLite database in WAL mode, so every gunicorn worker reads
+and writes the same rooms and readers never wait on the writer. Each change
+runs in its own write transaction, which keeps a room's `seq` consistent
+across workers. `LocalBusManager` carries Socket.IO broadcasts between the
+workers over Unix datagram sockets, doing the job Redis pub/sub does for
+`message_queue`.
+
+sqlite3 calls block their thread, so under gevent every store call runs in
+the hub's thread pool while the calling greenlet waits on the store lock.
+
+Room semantics (what each change does to a room dict) stay in app.py. The
+store is given the functions that apply a change and decode a stored room.
+"""
+
+import functools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from scoring_marks import merge_marks
+
+try:
+    import socketio
+except ImportError:  # flask-socketio not installed; the bus is unavailable
+    socketio = None
+
+try:
+    from gevent import get_hub, monkey
+except ImportError:  # not running under gevent
+    get_hub = monkey = None
+
+
+def _call(func, args, kwargs):
+    return func(*args, **kwargs)
+
+
+def _call_in_threadpool(func, args, kwargs):
+    return get_hub().threadpool.apply(func, args, kwargs)
+
+
+def _serialized(method):
+    """Run a store method under the store lock, through the store's runner."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return self._run(method, (self,) + args, kwargs)
+    return wrapper
+
+
+class LocalRoomStore:
+    """Rooms, judge presence, standings and marks in a SQLite database shared by local workers."""
+
+    def __init__(self, path, apply_op, decode_room):
+        self.path = path
+        self._apply_op = apply_op
+        self._decode_room = decode_room
+        # Patched threading means a gevent lock: greenlets wait on it cooperatively
+        patched = monkey is not None and monkey.is_module_patched('threading')
+        self._run = _call_in_threadpool if patched else _call
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        with self._transaction() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS ws_rooms (code TEXT PRIMARY KEY, data TEXT NOT NULL)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS ws_presence (
+                code TEXT NOT NULL, judge_num INTEGER NOT NULL, sid TEXT NOT NULL,
+                expires_at REAL NOT NULL, PRIMARY KEY (code, judge_num))''')
+            # round_num 0 is the cumulative standing; `rounds` counts the rounds it covers
+            conn.execute('''CREATE TABLE IF NOT EXISTS ws_standings (
+                code TEXT NOT NULL, round_num INTEGER NOT NULL, competitor TEXT NOT NULL,
+                total REAL NOT NULL, rounds INTEGER NOT NULL, PRIMARY KEY (code, round_num, competitor))''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ws_standings_rank ON ws_standings (code, round_num, total)')
+            # marks: JSON array of one judge's sorted packed marks
+            conn.execute('''CREATE TABLE IF NOT EXISTS ws_marks (
+                code TEXT NOT NULL, judge_num INTEGER NOT NULL, marks TEXT NOT NULL,
+                PRIMARY KEY (code, judge_num))''')
+
+    def _connection(self):
+        # One connection per process; never reuse one inherited across a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    class _Transaction:
+        def __init__(self, store):
+            self.store = store
+
+        def __enter__(self):
+            self.conn = self.store._connection()
+            # Take the write lock up front so read-modify-write can't interleave
+            self.conn.execute('BEGIN IMMEDIATE')
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+    def _transaction(self):
+        return self._Transaction(self)
+
+    def _read(self, sql, params=()):
+        return self._connection().execute(sql, params).fetchall()
+
+    def _load(self, conn, code):
+        row = conn.execute('SELECT data FROM ws_rooms WHERE code = ?', (code,)).fetchone()
+        return self._decode_room(json.loads(row[0])) if row else None
+
+    # --- Rooms ---
+
+    @_serialized
+    def get(self, code):
+        rows = self._read('SELECT data FROM ws_rooms WHERE code = ?', (code,))
+        return self._decode_room(json.loads(rows[0][0])) if rows else None
+
+    @_serialized
+    def all(self):
+        return {code: self._decode_room(json.loads(data))
+                for code, data in self._read('SELECT code, data FROM ws_rooms ORDER BY code')}
+
+    @_serialized
+    def exists(self, code):
+        return bool(self._read('SELECT 1 FROM ws_rooms WHERE code = ?', (code,)))
+
+    @_serialized
+    def is_empty(self):
+        return not self._read('SELECT 1 FROM ws_rooms LIMIT 1')
+
+    @_serialized
+    def apply(self, op, check=None):
+        """Apply one room change atomically and return the room afterwards.
+
+        The change gets the room's next seq inside the transaction. Returns
+        None if the room doesn't exist (or was deleted), False if `check`
+        rejected the current room.
+        """
+        code = op['code']
+        with self._transaction() as conn:
+            room = self._load(conn, code)
+            if op['op'] == 'del':
+                conn.execute('DELETE FROM ws_rooms WHERE code = ?', (code,))
+                conn.execute('DELETE FROM ws_presence WHERE code = ?', (code,))
+                return None
+            if op['op'] != 'set':
+                if room is None:
+                    return None
+                if check is not None and not check(room):
+                    return False
+                op = dict(op, seq=room.get('seq', 0) + 1)
+            rooms = {code: room} if room is not None else {}
+            self._apply_op(rooms, op)
+            room = rooms[code]
+            conn.execute('INSERT INTO ws_rooms (code, data) VALUES (?, ?) '
+                         'ON CONFLICT (code) DO UPDATE SET data = excluded.data',
+                         (code, json.dumps(room, default=str)))
+            return room
+
+    @_serialized
+    def create(self, code, room):
+        """Save a new room unless the code is taken. Returns True if created."""
+        with self._transaction() as conn:
+            if conn.execute('SELECT 1 FROM ws_rooms WHERE code = ?', (code,)).fetchone():
+                return False
+            rooms = {}
+            self._apply_op(rooms, {'op': 'set', 'code': code, 'room': room})
+            conn.execute('INSERT INTO ws_rooms (code, data) VALUES (?, ?)',
+                         (code, json.dumps(rooms[code], default=str)))
+            return True
+
+    @_serialized
+    def import_rooms(self, rooms):
+        """Copy rooms in if the store is still empty. Returns True if it imported them."""
+        with self._transaction() as conn:
+            if conn.execute('SELECT 1 FROM ws_rooms LIMIT 1').fetchone():
+                return False  # another worker got there first
+            for code, room in rooms.items():
+                conn.execute('INSERT INTO ws_rooms (code, data) VALUES (?, ?)',
+                             (code, json.dumps(room, default=str)))
+            return True
+
+    # --- Presence ---
+
+    @_serialized
+    def set_presence(self, code, judge_num, sid, ttl):
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO ws_presence (code, judge_num, sid, expires_at) '
+                         'VALUES (?, ?, ?, ?)', (code, judge_num, sid, time.time() + ttl))
+
+    @_serialized
+    def refresh_presence(self, code, judge_num, sid, ttl):
+        """0 if another socket holds the seat, 1 if refreshed, 2 if the judge had timed out."""
+        now = time.time()
+        with self._transaction() as conn:
+            room = self._load(conn, code)
+            judge = room.get('judges', {}).get(judge_num) if room else None
+            if not judge or judge.get('sid') != sid:
+                return 0
+            row = conn.execute('SELECT expires_at FROM ws_presence WHERE code = ? AND judge_num = ?',
+                               (code, judge_num)).fetchone()
+            conn.execute('INSERT OR REPLACE INTO ws_presence (code, judge_num, sid, expires_at) '
+                         'VALUES (?, ?, ?, ?)', (code, judge_num, sid, now + ttl))
+            return 1 if row and row[0] > now else 2
+
+    @_serialized
+    def clear_presence(self, code, judge_num, sid):
+        """Remove a judge's presence if `sid` still holds the seat. Returns True if it was present."""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT sid, expires_at FROM ws_presence WHERE code = ? AND judge_num = ?',
+                               (code, judge_num)).fetchone()
+            if not row or row[0] != sid:
+                return False
+            conn.execute('DELETE FROM ws_presence WHERE code = ? AND judge_num = ?', (code, judge_num))
+            return row[1] > time.time()
+
+    @_serialized
+    def present(self, seats):
+        """The subset of (code, judge_num) seats whose presence hasn't expired."""
+        codes = sorted({code for code, _ in seats})
+        if not codes:
+            return set()
+        rows = self._read(f"SELECT code, judge_num FROM ws_presence WHERE expires_at > ? "
+                          f"AND code IN ({', '.join('?' * len(codes))})", [time.time()] + codes)
+        return {(code, judge_num) for code, judge_num in rows} & set(seats)
+
+    # --- Standings ---
+
+    @_serialized
+    def add_standing(self, code, competitor, total):
+        """Add a round total to a competitor's standing. Returns their round number."""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT total, rounds FROM ws_standings '
+                               'WHERE code = ? AND round_num = 0 AND competitor = ?',
+                               (code, competitor)).fetchone()
+            cumulative, rounds = (row[0] + total, row[1] + 1) if row else (total, 1)
+            conn.executemany('INSERT OR REPLACE INTO ws_standings (code, round_num, competitor, total, rounds) '
+                             'VALUES (?, ?, ?, ?, ?)',
+                             [(code, 0, competitor, cumulative, rounds), (code, rounds, competitor, total, 1)])
+            return rounds
+
+    @_serialized
+    def standings(self, code, limit, round_num=0):
+        """Top `limit` (competitor, total, rounds) rows, best first."""
+        return self._read('SELECT competitor, total, rounds FROM ws_standings '
+                          'WHERE code = ? AND round_num = ? ORDER BY total DESC, competitor LIMIT ?',
+                          (code, round_num, limit))
+
+    @_serialized
+    def projected_rank(self, code, competitor, round_total):
+        """Cumulative rank the competitor would have with `round_total` added."""
+        rows = self._read('SELECT total FROM ws_standings WHERE code = ? AND round_num = 0 AND competitor = ?',
+                          (code, competitor))
+        projected = (rows[0][0] if rows else 0) + round_total
+        return self._read('SELECT COUNT(*) FROM ws_standings WHERE code = ? AND round_num = 0 AND total > ?',
+                          (code, projected))[0][0] + 1
+
+    @_serialized
+    def reset_standings(self, code):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM ws_standings WHERE code = ?', (code,))
+
+    # --- Marks ---
+
+    @_serialized
+    def update_marks(self, code, judge_num, add, remove, limit):
+        """Add and remove a judge's marks; returns them sorted, at most `limit`."""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT marks FROM ws_marks WHERE code = ? AND judge_num = ?',
+                               (code, judge_num)).fetchone()
+            marks = merge_marks(json.loads(row[0]) if row else [], add, remove)[:limit]
+            conn.execute('INSERT OR REPLACE INTO ws_marks (code, judge_num, marks) VALUES (?, ?, ?)',
+                         (code, judge_num, json.dumps(marks, separators=(',', ':'))))
+            return marks
+
+    @_serialized
+    def marks(self, code):
+        return {judge_num: json.loads(marks)
+                for judge_num, marks in self._read('SELECT judge_num, marks FROM ws_marks WHERE code = ?', (code,))
+                if marks != '[]'}
+
+    @_serialized
+    def clear_marks(self, code):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM ws_marks WHERE code = ?', (code,))
+
+
+if socketio is not None:
+
+    class LocalBusManager(socketio.PubSubManager):
+        """Socket.IO client manager that fans broadcasts out to the workers on this host.
+
+        Each worker binds a Unix datagram socket in `url` (a directory) and
+        every published message is sent to all sockets there, including the
+        sender's own, the way Redis pub/sub delivers to every subscriber.
+        """
+
+        name = 'localbus'
+        MAX_MESSAGE = 1 << 20
+
+        def __init__(self, url, channel='socketio', write_only=False, logger=None):
+            super().__init__(channel=channel, write_only=write_only, logger=logger)
+            self.directory = url
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            self._sender = None
+
+        def _publish(self, data):
+            if self._sender is None:
+                self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.MAX_MESSAGE)
+            message = json.dumps(data).encode()
+            for name in os.listdir(self.directory):
+                if not name.endswith('.sock'):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    self._sender.sendto(message, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Left behind by a worker that exited
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except OSError as e:
+                    print(f"[LOCAL_BUS] Error publishing to {name}: {e}")
+
+        def _listen(self):
+            path = os.path.join(self.directory, f'{os.getpid()}.sock')
+            if os.path.exists(path):
+                os.unlink(path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.MAX_MESSAGE)
+            sock.bind(path)
+            try:
+                while True:
+                    yield sock.recv(self.MAX_MESSAGE)
+            finally:
+                sock.close()
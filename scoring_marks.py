@@ -0,0 +1,64 @@
+"""Timestamped point marks for formation (FS/CF) judging.
+
+Instead of typing a final point count, a judge taps as each formation
+completes on the video. A mark is one integer: the video time in
+milliseconds times two, plus its kind (0 = point, 1 = bust). A judge's
+marks are kept sorted, and sent as deltas from the previous mark, so a
+40-second jump with 20 points is about 20 small numbers. The point total
+is derived from the marks. Like grading.py, this module has no Flask or
+database imports.
+"""
+
+MARK_POINT = 0
+MARK_BUST = 1
+MAX_MARK_TIME_MS = 3600 * 1000
+MAX_MARKS_PER_BATCH = 50
+
+
+def pack_mark(time_ms, kind):
+    return int(time_ms) * 2 + kind
+
+
+def unpack_mark(mark):
+    """(time in ms, kind) of a packed mark."""
+    return divmod(mark, 2)
+
+
+def encode_marks(marks):
+    """Delta-encode sorted packed marks: [first, second - first, ...]."""
+    encoded = []
+    previous = 0
+    for mark in marks:
+        encoded.append(mark - previous)
+        previous = mark
+    return encoded
+
+
+def decode_marks(encoded):
+    """Packed marks from their delta encoding.
+
+    Raises ValueError if the data is not a list of integers that decodes
+    to in-range marks in ascending order.
+    """
+    if not isinstance(encoded, list) or len(encoded) > MAX_MARKS_PER_BATCH:
+        raise ValueError(f'Marks must be a list of at most {MAX_MARKS_PER_BATCH} numbers')
+    marks = []
+    current = 0
+    for delta in encoded:
+        if not isinstance(delta, int) or isinstance(delta, bool) or (marks and delta < 0):
+            raise ValueError('Marks must be ascending whole numbers')
+        current += delta
+        if not 0 <= current <= pack_mark(MAX_MARK_TIME_MS, MARK_BUST):
+            raise ValueError('Mark time out of range')
+        marks.append(current)
+    return marks
+
+
+def merge_marks(marks, add=(), remove=()):
+    """A judge's sorted marks after adding and removing some."""
+    removed = set(remove)
+    return sorted(set(mark for mark in marks if mark not in removed) | set(add))
+
+
+def count_points(marks):
+    return sum(1 for mark in marks if mark % 2 == MARK_POINT)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Dedicated live-scoring server.
+
+Serves only the /scoring/* routes and the ws_scoring_* Socket.IO events, so
+judges' score broadcasts never queue behind admin pages, grading or
+reports. Run one process per entry in SCORING_SHARD_URLS, each with its own
+SCORING_SHARD_URL, and point them all at the same REDIS_URL. Rooms then
+spread over the processes by a consistent hash of the room code, and Redis
+carries broadcasts between them and the main app:
+
+    SCORING_SHARD_URL=https://score1.example.org \\
+        gunicorn -k geventwebsocket.gunicorn.workers.GeventWebSocketWorker -w 1 \\
+        --bind 0.0.0.0:$PORT scoring_server:app
+
+Route /scoring/ and /socket.io/ to these processes and everything else to
+app:app. A single process also works without sharding:
+
+    python scoring_server.py --port 8001
+"""
+
+import argparse
+import os
+
+os.environ.setdefault('APP_ROLE', 'scoring')
+
+from app import app, socketio, SOCKETIO_ENABLED  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the live-scoring server.')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8001)))
+    args = parser.parse_args()
+    if not SOCKETIO_ENABLED:
+        raise SystemExit('flask-socketio is not installed')
+    socketio.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()